@@ -1,8 +1,6 @@
 """Classes for representing the board state and the board itself."""
 
-import re
-from copy import deepcopy
-from typing import Dict, List, Tuple, Union, overload
+from typing import Dict, Iterator, List, Tuple, Union, overload
 
 
 from common import *
@@ -19,31 +17,372 @@ from move import (
     SemiPromotion,
 )
 from piece import Bishop, King, Knight, Pawn, Piece, Queen, Rook
+import zobrist
+
+_PLAYERS: Dict[str, Player] = {"w": Player.WHITE, "b": Player.BLACK}
+"""The accepted tokens for the current player in a status line, and the player each denotes"""
+_WALL_COUNTS: Dict[str, int] = {str(count): count for count in range(4)}
+"""The accepted tokens for a wall count in a status line, and the count each denotes"""
+_CASTLING_RIGHTS: Dict[str, int] = {"+": 1, "-": 0}
+"""The accepted tokens for a castling right in a status line, and whether each grants the right"""
+_CASTLING_STRS: Tuple[str, ...] = tuple(
+    " ".join("+" if rights >> i & 1 else "-" for i in range(4)) for rights in range(16)
+)
+"""The castling block of a status line for each packed set of castling rights"""
+_ENPASSANT_FILES = frozenset("abcdefg")
+"""The accepted files of an en-passant target in a status line"""
+_ENPASSANT_RANKS = frozenset("12345678")
+"""The accepted ranks of an en-passant target in a status line"""
+_WALL_MODIFIERS: Dict[str, int] = {"|": Wall.WEST.value, "_": Wall.SOUTH.value}
+"""The value of the wall added by each modifier that may precede a node specifier"""
+
+_NULL_MOVE = NullMove.type_index
+"""The `type_index` of a null move, used to dispatch on the kind of a move without an `isinstance` chain"""
+_PLACE_WALL = PlaceWall.type_index
+"""The `type_index` of a wall placement"""
+_PLACE_MINE = PlaceMine.type_index
+"""The `type_index` of a mine placement"""
+_PLACE_TRAPDOOR = PlaceTrapdoor.type_index
+"""The `type_index` of a trapdoor placement"""
+_PROMOTION = Promotion.type_index
+"""The `type_index` of a promotion"""
+_CASTLES = frozenset((QueenCastle.type_index, KingCastle.type_index))
+"""The `type_index` of either castling move"""
+
+ROOK_CASTLING = {
+    (player, x): CASTLING_RIGHTS[player][side]
+    for player in Player
+    for x, side in ((0, "queen"), (7, "king"))
+}
+"""The castling right lost when a player's rook moves from the given x coordinate"""
+
+ROOK_DIRS = (P(1, 0), P(-1, 0), P(0, 1), P(0, -1))
+"""The directions a rook can move in"""
+BISHOP_DIRS = (P(1, 1), P(-1, -1), P(1, -1), P(-1, 1))
+"""The directions a bishop can move in"""
+QUEEN_DIRS = ROOK_DIRS + BISHOP_DIRS
+"""The directions a queen can move in"""
+KING_DIRS = QUEEN_DIRS
+"""The directions a king can move in"""
+PAWN_DIAGS = (P(-1, 0), P(1, 0))
+"""The offsets from the square in front of a pawn to the squares it can capture on"""
+
+_DIAGONAL_MOTION: Dict[Tuple[bool, bool], Tuple[Wall, Wall, Wall, Wall]] = {
+    (east, north): (
+        Wall.NORTH if north else Wall.SOUTH,
+        Wall.EAST if east else Wall.WEST,
+        Wall.SOUTH if north else Wall.NORTH,
+        Wall.WEST if east else Wall.EAST,
+    )
+    for east in (True, False)
+    for north in (True, False)
+}
+"""The walls crossed by a diagonal step, keyed by whether it moves east and whether it moves north.
+
+Each entry is (horizontal wall, vertical wall, inverse horizontal wall, inverse vertical wall).
+"""
+
+
+def _ray(origin: Position, direction: Position) -> List[Position]:
+    """Returns the positions from origin (inclusive) to the edge of the board along direction"""
+    ray = []
+    while 0 <= origin.x < 8 and 0 <= origin.y < 8:
+        ray.append(origin)
+        origin += direction
+    return ray
+
+
+RAYS: Dict[Tuple[int, int], List[List[Position]]] = {
+    (d.x, d.y): [_ray(P(sq % 8, sq // 8), d) for sq in range(64)] for d in QUEEN_DIRS
+}
+"""The line from each square to the edge of the board in each queen direction, keyed by direction and then indexed by square"""
+
+KNIGHT_TARGETS: List[Tuple[Position, ...]] = [
+    tuple(
+        P(sq % 8, sq // 8) + offset
+        for offset in Knight.offsets
+        if 0 <= sq % 8 + offset.x < 8 and 0 <= sq // 8 + offset.y < 8
+    )
+    for sq in range(64)
+]
+"""The on-board squares a knight can reach from each square"""
+
+SQUARES: Tuple[Position, ...] = tuple(P(sq % 8, sq // 8) for sq in range(64))
+"""The position of each square index"""
+
+
+def _mask(positions) -> int:
+    """Returns the bitboard with the bit of each of the given (on-board) positions set"""
+    bb = 0
+    for pos in positions:
+        bb |= 1 << (pos.y * 8 + pos.x)
+    return bb
+
+
+def _on_board(pos: Position) -> bool:
+    return 0 <= pos.x < 8 and 0 <= pos.y < 8
+
+
+RAY_MASKS: Dict[Tuple[int, int], List[int]] = {
+    d: [_mask(ray[1:]) for ray in rays] for d, rays in RAYS.items()
+}
+"""The bitboard of each ray in `RAYS`, excluding its origin"""
+
+
+def _lines_to(sq: int) -> List[int]:
+    retval = [0] * 64
+    for rays in RAYS.values():
+        ray = rays[sq]
+        for i in range(1, len(ray)):
+            retval[ray[i].y * 8 + ray[i].x] = _mask(ray[:i])
+    return retval
+
+
+LINES_TO: List[List[int]] = [_lines_to(sq) for sq in range(64)]
+"""The bitboard of the line from one square up to (but excluding) another, indexed by both squares.
+
+Includes the first square, matching `Board.get_between`, and is empty for squares that do not share a line.
+"""
+
+KNIGHT_ATTACKS: List[int] = [_mask(targets) for targets in KNIGHT_TARGETS]
+"""The bitboard of the squares a knight attacks from each square"""
+
+NEIGHBOURS: List[Tuple[Position, ...]] = [
+    tuple(pos + d for d in KING_DIRS if _on_board(pos + d)) for pos in SQUARES
+]
+"""The on-board neighbours of each square"""
+
+KING_ATTACKS: List[int] = [_mask(neighbours) for neighbours in NEIGHBOURS]
+"""The bitboard of the squares a king attacks from each square"""
+
+PAWN_ATTACKERS: Dict[int, List[int]] = {
+    player.value: [
+        _mask(
+            pos + P(dx, -player.value)
+            for dx in (-1, 1)
+            if _on_board(pos + P(dx, -player.value))
+        )
+        for pos in SQUARES
+    ]
+    for player in Player
+}
+"""The bitboard of the squares from which a pawn (keyed by its owner's value) attacks each square"""
+
+MINE_BLAST: List[Tuple[Tuple[Tuple[int, int], int], ...]] = [
+    tuple(
+        ((d.x, d.y), (pos.y + d.y) * 8 + pos.x + d.x) for d in KING_DIRS if _on_board(pos + d)
+    )
+    for pos in SQUARES
+]
+"""The (direction, square) of each neighbour a mine on each square can clear"""
+
+CASTLE_PATHS: Dict[str, List[int]] = {
+    side: [
+        _mask(pos + P(dx, 0) for dx in offsets if _on_board(pos + P(dx, 0)))
+        for pos in SQUARES
+    ]
+    for side, offsets in (("king", (1, 2)), ("queen", (-1, -2, -3)))
+}
+"""The bitboard of the squares between a king on each square and its rook, for castling on each side"""
+
+EDGE_STOPS: Dict[Tuple[int, int], int] = {
+    (d.x, d.y): _mask(pos for pos in SQUARES if not _on_board(pos + d))
+    for d in QUEEN_DIRS
+}
+"""The bitboard of the squares from which a step in each direction leaves the board"""
+
+_FULL = (1 << 64) - 1
+"""The bitboard with every square set"""
+NOT_FILE_A = _FULL ^ _mask(P(0, y) for y in range(8))
+"""The bitboard with every square not on the a-file set"""
+NOT_FILE_H = _FULL ^ _mask(P(7, y) for y in range(8))
+"""The bitboard with every square not on the h-file set"""
+
+
+def _from_neighbour(bb: int, step: int) -> int:
+    """Shifts a bitboard so that each square holds the bit of the square `step` indices away from it"""
+    return bb >> step if step > 0 else (bb << -step) & _FULL
+
+
+def _wall_stops(north: int, south: int, east: int, west: int) -> Dict[Tuple[int, int], int]:
+    """Returns the bitboard of the squares from which a step in each queen direction is blocked, given the bitboard of each wall.
+
+    Mirrors the rules of `Board.wall_blocked`.
+    Squares on the edge the step would leave are stopped regardless, which also hides any bits wrapped round by the shifts.
+    """
+    stops = {
+        (1, 0): east,
+        (-1, 0): west,
+        (0, 1): north,
+        (0, -1): south,
+    }
+    for dx in (1, -1):
+        for dy in (1, -1):
+            hori, inv_hori = (north, south) if dy > 0 else (south, north)
+            vert, inv_vert = (east, west) if dx > 0 else (west, east)
+            stops[(dx, dy)] = (
+                # both motion walls on this square
+                (hori & vert)
+                # the horizontal motion wall continues on the horizontal neighbour
+                | (hori & _from_neighbour(hori, dx))
+                # the vertical motion wall continues on the vertical neighbour
+                | (vert & _from_neighbour(vert, dy * 8))
+                # both inverse motion walls on the destination
+                | _from_neighbour(inv_hori & inv_vert, dy * 8 + dx)
+            )
+    return {d: stop | EDGE_STOPS[d] for d, stop in stops.items()}
+
+
+def piece_code(piece: Union[Piece, None]) -> int:
+    """Returns an integer identifying both the type and owner of a piece.
+
+    The magnitude is the piece's `type_index` and the sign is its owner's value, with 0 for an empty node.
+    """
+    return 0 if piece is None else piece.type_index * piece.owner.value
+
+
+_TRAPDOOR_MASK = 0b11
+"""The bits of `BoardNode._flags` holding the trapdoor state's value"""
+_MINED_FLAG = 0b100
+"""The bit of `BoardNode._flags` set when the node is mined"""
+_WALLS_SHIFT = 3
+"""The offset of the walls within `BoardNode._flags`"""
+
+_TRAPDOOR_STATES = (None,) + tuple(TrapdoorState)
+"""Each trapdoor state, indexed by its value"""
+_WALL_FLAGS = tuple(Wall(i) for i in range(16))
+"""Each combination of walls, indexed by its value"""
+
+_EMPTY_NODE_STRS = ("", ".", "D", "O", "", "M", "X", "")
+"""The canonical form of a node without a piece, indexed by its trapdoor and mine bits"""
+_WALL_PREFIXES = tuple(
+    ("|" if Wall(i) & Wall.WEST else "") + ("_" if Wall(i) & Wall.SOUTH else "")
+    for i in range(16)
+)
+"""The prefix added to a node's canonical form for each combination of walls"""
+
+_PIECE_STRS: Dict[int, str] = {
+    piece_code(cls(player)): cls(player).canonical()
+    for cls in (Pawn, Knight, Bishop, Rook, Queen, King)
+    for player in Player
+}
+"""The canonical form of each piece, keyed by piece code"""
+_PIECES_BY_STR: Dict[str, Piece] = {
+    piece.canonical(): piece
+    for piece in (cls(player) for cls in (Pawn, Knight, Bishop, Rook, Queen, King) for player in Player)
+}
+"""A shared instance of each piece, keyed by its canonical form. Pieces hold no positional state, so boards can share them."""
+_NODE_STRS: Tuple[Dict[int, str], ...] = tuple(
+    {
+        code: _WALL_PREFIXES[flags >> _WALLS_SHIFT]
+        + (
+            _PIECE_STRS[code]
+            if code
+            else _EMPTY_NODE_STRS[flags & (_TRAPDOOR_MASK | _MINED_FLAG)]
+        )
+        for code in [0, *_PIECE_STRS]
+    }
+    for flags in range(1 << (_WALLS_SHIFT + 4))
+)
+"""The canonical form of every node, indexed by its flags and then keyed by the piece code of its contents"""
+
+_PIECE_KEYS: Dict[int, List[int]] = {
+    0: [0] * 64,
+    **{piece_code(piece): zobrist.PIECES[(piece.name, piece.owner)] for piece in _PIECES_BY_STR.values()},
+}
+"""The Zobrist key of each piece code on each square"""
+_FLAG_KEYS: Dict[int, List[int]] = {}
+"""The Zobrist key of each node flags value on each square, filled in by `_flag_keys` as values are first seen"""
+
+
+def _flag_keys(flags: int) -> List[int]:
+    """Returns the Zobrist key of the mine, trapdoor and walls packed into a node's flags, on each square"""
+    keys = _FLAG_KEYS.get(flags)
+    if keys is None:
+        trapdoor = _TRAPDOOR_STATES[flags & _TRAPDOOR_MASK] or TrapdoorState.NONE
+        walls = _WALL_FLAGS[flags >> _WALLS_SHIFT]
+        keys = _FLAG_KEYS[flags] = [
+            (zobrist.MINES[sq] if flags & _MINED_FLAG else 0)
+            ^ zobrist.TRAPDOORS[trapdoor][sq]
+            ^ zobrist.walls_hash(walls, sq)
+            for sq in range(64)
+        ]
+    return keys
+
+
+_OBSTACLE_NODES: Dict[str, Tuple[bool, TrapdoorState]] = {
+    "D": (False, TrapdoorState.HIDDEN),
+    "O": (False, TrapdoorState.OPEN),
+    "M": (True, TrapdoorState.NONE),
+    "X": (True, TrapdoorState.HIDDEN),
+}
+"""The (mined, trapdoor) state of the node described by each obstacle character"""
 
 
 class BoardNode:
     """Logical representation of a node on the board.
 
     Maintains info on mines, trapdoors and pieces on the node.
+    The mine, trapdoor and walls are packed together into a single int.
 
     Provides a `canonical()` method for transforming this node into a string that describes it, in the format required by the spec.
     """
 
+    __slots__ = ("contents", "_flags")
+
     def __init__(
         self, contents: Union[Piece, None], mined: bool, trapdoor: TrapdoorState
     ) -> None:
         self.contents = contents
         """The contents of a tile (`None` or `Piece`)"""
-        self.mined = mined
+        self._flags = trapdoor.value | (_MINED_FLAG if mined else 0)
+        """The trapdoor state (bits 0-1), mine (bit 2) and walls (bits 3-6) of this tile"""
+
+    @property
+    def mined(self) -> bool:
         """Whether there is a mine on this tile"""
-        self.trapdoor = trapdoor
+        return bool(self._flags & _MINED_FLAG)
+
+    @mined.setter
+    def mined(self, mined: bool):
+        self._flags = (self._flags | _MINED_FLAG) if mined else (self._flags & ~_MINED_FLAG)
+
+    @property
+    def trapdoor(self) -> TrapdoorState:
         """Whether there is a trapdoor on this tile, and its state"""
-        self.walls = Wall(0)
+        return _TRAPDOOR_STATES[self._flags & _TRAPDOOR_MASK]
+
+    @trapdoor.setter
+    def trapdoor(self, trapdoor: TrapdoorState):
+        self._flags = (self._flags & ~_TRAPDOOR_MASK) | trapdoor.value
+
+    @property
+    def walls(self) -> Wall:
         """Which walls are present on this tile"""
+        return _WALL_FLAGS[self._flags >> _WALLS_SHIFT]
+
+    @walls.setter
+    def walls(self, walls: Wall):
+        self._flags = (self._flags & (_TRAPDOOR_MASK | _MINED_FLAG)) | (walls.value << _WALLS_SHIFT)
 
     def __str__(self) -> str:
         return f"Node({self.contents}, {self.mined}, {self.trapdoor}, {Wall.to_str(self.walls)})"
 
+    def clone(self) -> "BoardNode":
+        """Creates a copy of this node.
+
+        Pieces hold no positional state, so the contents are shared with the copy.
+
+        Returns
+        -------
+        BoardNode
+            The copied node.
+        """
+        node = BoardNode.__new__(BoardNode)
+        node.contents = self.contents
+        node._flags = self._flags
+        return node
+
     def __repr__(self):
         return self.canonical()
 
@@ -55,35 +394,7 @@ class BoardNode:
         str
             The canonical representation of the node.
         """
-        node_str = ""
-        # If there is a piece on the node, add it to the string
-        if self.contents is None:
-            if self.mined:
-                if self.trapdoor == TrapdoorState.HIDDEN:
-                    node_str += "X"
-                # no trapdoor and a mine
-                elif self.trapdoor == TrapdoorState.NONE:
-                    node_str += "M"
-            # no mine and a hidden trapdoor
-            elif self.trapdoor == TrapdoorState.HIDDEN:
-                node_str += "D"
-            # no mine and an open trapdoor
-            elif self.trapdoor == TrapdoorState.OPEN:
-                node_str += "O"
-            # no mine and no trapdoor
-            elif self.trapdoor == TrapdoorState.NONE:
-                node_str += "."
-        else:
-            # if there is a piece, add it to the string
-            node_str += self.contents.canonical()
-        # prepend walls to the string
-        if self.walls & Wall.SOUTH:
-            node_str = f"_{node_str}"
-        if self.walls & Wall.WEST:
-            node_str = f"|{node_str}"
-
-        # return the string
-        return node_str
+        return _NODE_STRS[self._flags][piece_code(self.contents)]
 
     @classmethod
     def from_str(cls, char: str) -> Result["BoardNode"]:
@@ -99,33 +410,26 @@ class BoardNode:
         BoardNode
             The created node.
         """
-        # Empty node
-        if char[0] == ".":
-            return Success(BoardNode(None, False, TrapdoorState.NONE))
-
-        # a mine or trapdoor
-        elif char[0] in ["D", "O", "M", "X"]:
-            if char == "D":
-                return Success(BoardNode(None, False, TrapdoorState.HIDDEN))
-            # open trapdoor
-            elif char == "O":
-                return Success(BoardNode(None, False, TrapdoorState.OPEN))
-            # mine
-            elif char == "M":
-                return Success(BoardNode(None, True, TrapdoorState.NONE))
-            # hidden trapdoor and a mine
-            elif char == "X":
-                return Success(BoardNode(None, True, TrapdoorState.HIDDEN))
-
-        # a piece
-        # This is evaluated last, so that isupper and islower can be used to check for pieces and dont get caught on mines/trapdoors
-
-        new_piece = Piece.from_str(char[0])
-        if isinstance(new_piece, Success):
-            return Success(BoardNode(new_piece.unwrap(), False, TrapdoorState.NONE))
-
-        # If the character could not be converted into a piece, return a Failure.
-        return Failure()
+        # an empty node, a mine or trapdoor, or a piece, all in a single lookup
+        template = _NODE_TEMPLATES.get(char[0])
+        if template is None:
+            # If the character could not be converted into a node, return a Failure.
+            return Failure()
+        return Success(template if template is EMPTY_NODE else template.clone())
+
+
+EMPTY_NODE = BoardNode(None, False, TrapdoorState.NONE)
+"""A shared node for empty squares with no obstacles.
+
+Must never be modified: boards replace it with a fresh node before changing a square that holds it.
+"""
+
+_NODE_TEMPLATES: Dict[str, BoardNode] = {
+    ".": EMPTY_NODE,
+    **{char: BoardNode(None, *obstacles) for char, obstacles in _OBSTACLE_NODES.items()},
+    **{char: BoardNode(piece, False, TrapdoorState.NONE) for char, piece in _PIECES_BY_STR.items()},
+}
+"""The node described by each specifier character, which `BoardNode.from_str` copies (other than `EMPTY_NODE`, which is shared)"""
 
 
 class BoardState:
@@ -138,23 +442,25 @@ class BoardState:
      - Halfmove clock
     """
 
+    __slots__ = ("player", "walls", "castling", "enpassant", "clock")
+
     def __init__(
         self,
         player: Player,
         walls: tuple,
-        castling: tuple,
+        castling: int,
         enpassant: Union[Position, None],
         clock: int,
     ) -> None:
         self.player = player
         """The current player"""
         self.walls = {Player.WHITE: walls[0], Player.BLACK: walls[1]}
-        """The number of walls available to each player"""
-        self.castling = {
-            Player.WHITE: {"king": castling[0], "queen": castling[1]},
-            Player.BLACK: {"king": castling[2], "queen": castling[3]},
-        }
-        """The players castling rights"""
+        """The number of walls available to each player.
+
+        Replaced rather than modified when a wall is placed, so copies of the state can share it.
+        """
+        self.castling = castling
+        """The players castling rights, packed as the bits of `CASTLING_RIGHTS`"""
         self.enpassant = enpassant
         """The current target for an en-passant"""
         self.clock = clock
@@ -184,10 +490,7 @@ class BoardState:
                 str(self.walls[Player.WHITE]),
                 str(self.walls[Player.BLACK]),
                 # the castling rights for each player
-                "+" if self.castling[Player.WHITE]["king"] else "-",
-                "+" if self.castling[Player.WHITE]["queen"] else "-",
-                "+" if self.castling[Player.BLACK]["king"] else "-",
-                "+" if self.castling[Player.BLACK]["queen"] else "-",
+                _CASTLING_STRS[self.castling],
                 # the enpassant target
                 self.enpassant.canonical() if self.enpassant else "-",
                 # the halfmove clock
@@ -203,14 +506,21 @@ class BoardState:
         BoardState
             The copied board state.
         """
-        return deepcopy(self)
+        # bypass `__init__`, every field is either immutable or replaced rather than modified
+        new_state = BoardState.__new__(BoardState)
+        new_state.player = self.player
+        new_state.walls = self.walls
+        new_state.castling = self.castling
+        new_state.enpassant = self.enpassant
+        new_state.clock = self.clock
+        return new_state
 
     @classmethod
     def from_str(cls, string: str) -> Result["BoardState"]:
         """Creates a BoardState from a string.
 
-        The string should match the following format:
-            `(w|b) ([0-3] ){2} ((\\+|-) ){4}(-|[a-g][1-8]) [1-9]\\d*`
+        The string should consist of nine whitespace separated blocks, in the following format:
+            `(w|b) ([0-3] ){2} ((\\+|-) ){4}(-|[a-g][1-8]) ([1-9]\\d*|0)`
 
         Parameters
         ----------
@@ -224,30 +534,51 @@ class BoardState:
         BoardState
             The created state.
         """
+        # split the string into blocks
+        blocks = string.split()
+
         # check that the string is valid, and conforms to the required format
         # this guarantees that any later operations will not fail
-        # matches as follows:
+        # checks as follows:
+        #   - there are exactly nine blocks
         #   - `(w|b)`: either w or b
-        #   - `([0-3] ){2}`:  two of a number between 0 and 3 followed by a space
-        #   - `((\+|-) ){4}`: four of either + or - followed by a space
+        #   - `[0-3]` (x2): two of a number between 0 and 3
+        #   - `(\+|-)` (x4): four of either + or -
         #   - `(-|[a-g][1-8])`: either a dash, or a letter between a and g followed by a number between 1 and 8
         #   - `([1-9]\d*|0)`: one or more digits, not starting with 0, or just 0
-        if not re.match(
-            r"(w|b) ([0-3] ){2}((\+|-) ){4}(-|[a-g][1-8]) ([1-9]\d*|0)", string
+        if (
+            len(blocks) != 9
+            or blocks[0] not in _PLAYERS
+            or blocks[1] not in _WALL_COUNTS
+            or blocks[2] not in _WALL_COUNTS
+            or not all(block in _CASTLING_RIGHTS for block in blocks[3:7])
+            or not (
+                blocks[7] == "-"
+                or len(blocks[7]) == 2
+                and blocks[7][0] in _ENPASSANT_FILES
+                and blocks[7][1] in _ENPASSANT_RANKS
+            )
+            or not (
+                blocks[8].isascii()
+                and blocks[8].isdigit()
+                and (blocks[8] == "0" or blocks[8][0] != "0")
+            )
         ):
             return Failure(Error.ILLEGAL_STATUSLINE)
 
-        # split the string into blocks
-        blocks = string.split()
-
         # extract the player
-        player = Player.from_str(blocks[0]).unwrap()
+        player = _PLAYERS[blocks[0]]
 
         # extract the number of walls
-        walls = tuple(map(int, blocks[1:3]))
-
-        # extract the castling rights
-        castling = tuple(map(lambda x: x == "+", blocks[3:7]))
+        walls = (_WALL_COUNTS[blocks[1]], _WALL_COUNTS[blocks[2]])
+
+        # extract the castling rights, packed in the order they appear
+        castling = (
+            _CASTLING_RIGHTS[blocks[3]]
+            | _CASTLING_RIGHTS[blocks[4]] << 1
+            | _CASTLING_RIGHTS[blocks[5]] << 2
+            | _CASTLING_RIGHTS[blocks[6]] << 3
+        )
 
         # extract the enpassant target
         enpassant_str = blocks[7]
@@ -261,7 +592,55 @@ class BoardState:
     @classmethod
     def standard_state(cls):
         """Generates a standard starting state, as in standard chess"""
-        return cls(Player.WHITE, (3, 3), (True, True, True, True), None, 0)
+        return cls(Player.WHITE, (3, 3), 0b1111, None, 0)
+
+
+TRANSPOSITION_LIMIT = 1 << 16
+"""The number of entries each transposition table holds before it is cleared"""
+
+_move_table: Dict[tuple, Tuple[Move, ...]] = {}
+"""The results of `Board.get_moves`, keyed by position hash and origin.
+
+Shared between boards, so a position reached by different move orders only has its moves generated once.
+"""
+_attack_table: Dict[tuple, Tuple[Position, ...]] = {}
+"""The results of `Board.being_attacked_at`, keyed by hash, position and attacking player, shared between boards"""
+_check_table: Dict[Tuple[int, int], bool] = {}
+"""The results of `Board.is_in_check`, keyed by the hash of the nodes and the player, shared between boards"""
+_validity_table: Dict[tuple, bool] = {}
+"""The results of `Board._is_valid_move`, keyed by position hash and the kind, player, origin and destination of the move, shared between boards"""
+
+
+def _remember(table: dict, key: tuple, value):
+    """Stores a result in a transposition table, clearing the table first if it is full"""
+    if len(table) >= TRANSPOSITION_LIMIT:
+        table.clear()
+    table[key] = value
+
+
+class MoveUndo:
+    """Records what `Board.make_move` changed, so that `Board.unmake_move` can restore it."""
+
+    __slots__ = ("move", "state", "turn", "mine_detonated", "nodes")
+
+    def __init__(
+        self,
+        move: Move,
+        state: BoardState,
+        turn: int,
+        mine_detonated: bool,
+        nodes: List[Tuple[Position, BoardNode]],
+    ) -> None:
+        self.move = move
+        """The move that was made"""
+        self.state = state
+        """The state before the move, which the move replaced rather than modified"""
+        self.turn = turn
+        """The turn counter before the move"""
+        self.mine_detonated = mine_detonated
+        """Whether a mine had detonated before the move"""
+        self.nodes = nodes
+        """The positions the move could change, with their original node"""
 
 
 class Board:
@@ -270,6 +649,25 @@ class Board:
     Maintains the boards current state, and provides methods for manipulating it.
     """
 
+    __slots__ = (
+        "_nodes",
+        "state",
+        "turn",
+        "initial_moves",
+        "mine_detonated",
+        "_hash",
+        "_codes",
+        "_bitboards",
+        "_occupied",
+        "_mines",
+        "_trapdoors",
+        "_walls",
+        "_wall_stops",
+        "_kings",
+        "_owned",
+        "_rows_cache",
+    )
+
     standard_board_str = [
         "rnbqkbnr",  # black pieces
         "pppppppp",
@@ -282,6 +680,9 @@ class Board:
         BoardState.standard_state().canonical(),  # standard state
     ]
 
+    _standard_board_lines = tuple(standard_board_str)
+    """The lines of `standard_board_str`, for comparing against in a single step"""
+
     empty_board_str = [
         "........",
         "........",
@@ -305,9 +706,9 @@ class Board:
         initial_moves: Dict[Player, Dict[str, int]],
         turn: int,
     ) -> None:
-        # The boards nodes, as a 2D array
-        self.nodes: List[List[BoardNode]] = board
-        """The tiles on the board"""
+        # The boards nodes, flattened row by row
+        self._nodes: List[BoardNode] = [node for row in board for node in row]
+        """The tiles on the board, indexed by `file * 8 + rank`"""
         self.state: BoardState = state
         """The state of the board"""
         self.turn = turn
@@ -317,26 +718,72 @@ class Board:
         """The number of initial moves allowed (i.e. the number of trap placements remaining)"""
         self.mine_detonated = False
         """Whether this board was the result of a mine detonation"""
-        
+        self._hash = 0
+        """The Zobrist hash of the nodes, kept up to date as the nodes are changed"""
+        self._codes: List[int] = [0] * 64
+        """The piece code (see `piece_code`) of the contents of each node, kept up to date as the nodes are changed"""
+        self._bitboards: Dict[int, int] = {}
+        """The bitboard of the squares holding each piece code, kept up to date as the nodes are changed"""
+        self._occupied = 0
+        """The bitboard of the squares holding any piece"""
+        self._mines = 0
+        """The bitboard of the mined squares"""
+        self._trapdoors: List[int] = [0] * 4
+        """The bitboard of the squares with a trapdoor in each state, indexed by the state's value (only HIDDEN and OPEN are tracked)"""
+        self._walls: List[int] = [0] * 4
+        """The bitboard of the squares with each wall, in the order the walls are packed into `BoardNode._flags` (N, S, E, W)"""
+        self._wall_stops: Union[Dict[Tuple[int, int], int], None] = None
+        """The bitboard of the squares from which a step in each direction is blocked, built on demand by `_get_wall_stops`"""
+        self._kings: Dict[Player, Position] = {}
+        """The position of each player's king, kept up to date as the nodes are changed"""
+        self._owned = 0
+        """The bitboard of the squares whose node belongs to this board alone, and so can be changed in place"""
+        self._rows_cache: Union[Tuple[int, List[str]], None] = None
+        """The canonical rows of the nodes, with the hash they were built for (see `_canonical_rows`)"""
+        # fill in the hash and the per-field tables in a single pass over the nodes
+        for sq, node in enumerate(self._nodes):
+            code = piece_code(node.contents)
+            self._hash ^= _PIECE_KEYS[code][sq] ^ _flag_keys(node._flags)[sq]
+            self._set_code(sq, code)
+            self._track_obstacles(sq, EMPTY_NODE._flags, node._flags)
+            if isinstance(node.contents, King):
+                self._kings[node.contents.owner] = SQUARES[sq]
+            if node is not EMPTY_NODE:
+                self._owned |= 1 << sq
+
         # Ensure that the walls are normalised (i.e. that each wall corresponds to a wall on the opposite side of the adjacent node)
         self.normalise_walls()
 
     def __getitem__(self, pos: Position) -> BoardNode:
         """Returns the node at the given coordinates."""
-        return self.nodes[pos.file][pos.rank]
+        return self._nodes[pos.y * 8 + pos.x]
 
     def __setitem__(self, pos: Position, value: BoardNode):
         """Sets the node at the given index to the given value."""
-        print(f"Setting {pos.canonical()} to {value}")
-        self.nodes[pos.file][pos.rank] = value
-
-    def __iter__(self) -> List[List[BoardNode]]:
+        if (pos.x | pos.y) & ~7:
+            raise IndexError(f"{pos} is not on the board")
+        sq = pos.y * 8 + pos.x
+        node = self._nodes[sq]
+        code = piece_code(value.contents)
+        self._hash ^= (
+            _PIECE_KEYS[self._codes[sq]][sq]
+            ^ _PIECE_KEYS[code][sq]
+            ^ _flag_keys(node._flags)[sq]
+            ^ _flag_keys(value._flags)[sq]
+        )
+        self._track_king(pos, node.contents, value.contents)
+        self._set_code(sq, code)
+        self._track_obstacles(sq, node._flags, value._flags)
+        self._nodes[sq] = value
+        # the node may be shared, so it is copied before it is next changed
+        self._owned &= ~(1 << sq)
+
+    def __iter__(self) -> Iterator[List[BoardNode]]:
         """Iterates over rows of the boards nodes."""
-        yield from self.nodes
-        return StopIteration()
+        return iter([self._nodes[y : y + 8] for y in range(0, 64, 8)])
 
     def __len__(self) -> int:
-        return len(self.nodes)
+        return 8
 
     def __repr__(self) -> str:
         return f"Board(player:{self.state.player.name})"
@@ -346,13 +793,148 @@ class Board:
     
     def __eq__(self, __o:"Board") -> bool:
         # only compares the actual board, not the status line
-        return self.canonical().split("\n")[:-1] == __o.canonical().split("\n")[:-1]
+        if self._hash != __o._hash:
+            return False
+        return self._canonical_rows() == __o._canonical_rows()
+
+    def __hash__(self) -> int:
+        # like __eq__, only considers the actual board
+        return self._hash
 
     def copy(self) -> "Board":
-        """Returns a copy of the board."""
-        return Board(
-            deepcopy(self.nodes), self.state.copy(), self.initial_moves, self.turn
-        )
+        """Returns a copy of the board.
+
+        Bypasses `__init__`, as the walls of this board have already been normalised.
+        The nodes are shared until either board changes them (see `_own_node`).
+        """
+        new_board = Board.__new__(Board)
+        new_board._nodes = self._nodes.copy()
+        new_board._owned = 0
+        self._owned = 0
+        new_board.state = self.state.copy()
+        new_board.turn = self.turn
+        new_board.initial_moves = self.initial_moves
+        new_board.mine_detonated = False
+        new_board._hash = self._hash
+        new_board._codes = self._codes.copy()
+        new_board._bitboards = self._bitboards.copy()
+        new_board._occupied = self._occupied
+        new_board._mines = self._mines
+        new_board._trapdoors = self._trapdoors.copy()
+        new_board._walls = self._walls.copy()
+        # never modified in place, so can be shared until either board's walls change
+        new_board._wall_stops = self._wall_stops
+        new_board._kings = self._kings.copy()
+        # keyed on the hash, so stays valid for whichever board keeps it
+        new_board._rows_cache = self._rows_cache
+        return new_board
+
+    ############
+    # Mutation #
+    ############
+
+    def set_contents(self, pos: Position, piece: Union[Piece, None]):
+        """Sets the contents of the node at the given position, keeping the hash up to date."""
+        sq, node = self._own_node(pos)
+        code = piece_code(piece)
+        self._hash ^= _PIECE_KEYS[self._codes[sq]][sq] ^ _PIECE_KEYS[code][sq]
+        self._track_king(pos, node.contents, piece)
+        self._set_code(sq, code)
+        node.contents = piece
+
+    def set_mined(self, pos: Position, mined: bool):
+        """Sets whether the node at the given position is mined, keeping the hash up to date."""
+        sq, node = self._own_node(pos)
+        flags = (node._flags | _MINED_FLAG) if mined else (node._flags & ~_MINED_FLAG)
+        self._hash ^= _flag_keys(node._flags)[sq] ^ _flag_keys(flags)[sq]
+        self._track_obstacles(sq, node._flags, flags)
+        node._flags = flags
+
+    def set_trapdoor(self, pos: Position, trapdoor: TrapdoorState):
+        """Sets the trapdoor state of the node at the given position, keeping the hash up to date."""
+        sq, node = self._own_node(pos)
+        flags = (node._flags & ~_TRAPDOOR_MASK) | trapdoor.value
+        self._hash ^= _flag_keys(node._flags)[sq] ^ _flag_keys(flags)[sq]
+        self._track_obstacles(sq, node._flags, flags)
+        node._flags = flags
+
+    def set_walls(self, pos: Position, walls: Wall):
+        """Sets the walls of the node at the given position, keeping the hash up to date."""
+        sq, node = self._own_node(pos)
+        flags = (node._flags & (_TRAPDOOR_MASK | _MINED_FLAG)) | (walls.value << _WALLS_SHIFT)
+        self._hash ^= _flag_keys(node._flags)[sq] ^ _flag_keys(flags)[sq]
+        self._track_obstacles(sq, node._flags, flags)
+        node._flags = flags
+
+    def _own_node(self, pos: Position) -> Tuple[int, BoardNode]:
+        """Returns the square index and node at the given position, first replacing the node with a copy if it is shared with another board (or is the shared `EMPTY_NODE`)."""
+        if (pos.x | pos.y) & ~7:
+            raise IndexError(f"{pos} is not on the board")
+        sq = pos.y * 8 + pos.x
+        node = self._nodes[sq]
+        bit = 1 << sq
+        if not self._owned & bit:
+            node = self._nodes[sq] = node.clone()
+            self._owned |= bit
+        return sq, node
+
+    def _track_obstacles(self, sq: int, old: int, new: int):
+        """Updates the obstacle bitboards of a square whose node flags change from `old` to `new`."""
+        changed = old ^ new
+        if not changed:
+            return
+        bit = 1 << sq
+        if changed & _MINED_FLAG:
+            self._mines ^= bit
+        if changed & _TRAPDOOR_MASK:
+            for state in (old & _TRAPDOOR_MASK, new & _TRAPDOOR_MASK):
+                if state != TrapdoorState.NONE.value:
+                    self._trapdoors[state] ^= bit
+        changed >>= _WALLS_SHIFT
+        if changed:
+            for i in range(4):
+                if changed >> i & 1:
+                    self._walls[i] ^= bit
+            self._wall_stops = None
+
+    def _set_code(self, sq: int, code: int):
+        """Updates the piece code and bitboards of a square."""
+        old = self._codes[sq]
+        if old == code:
+            return
+        bit = 1 << sq
+        if old:
+            self._bitboards[old] ^= bit
+        if code:
+            self._bitboards[code] = self._bitboards.get(code, 0) | bit
+            self._occupied |= bit
+        else:
+            self._occupied &= ~bit
+        self._codes[sq] = code
+
+    def _get_wall_stops(self) -> Dict[Tuple[int, int], int]:
+        """Returns the bitboard of the squares from which a step in each queen direction is blocked, by a wall or the edge of the board."""
+        if self._wall_stops is None:
+            if any(self._walls):
+                self._wall_stops = _wall_stops(*self._walls)
+            else:
+                self._wall_stops = EDGE_STOPS
+        return self._wall_stops
+
+    def _track_king(self, pos: Position, old: Union[Piece, None], new: Union[Piece, None]):
+        """Updates the cached king positions when the contents of a node change from `old` to `new`."""
+        if isinstance(old, King) and self._kings.get(old.owner) == pos:
+            del self._kings[old.owner]
+        if isinstance(new, King):
+            self._kings[new.owner] = pos
+
+    def _kings_in_scan_order(self) -> List[Tuple[Player, Position]]:
+        """Returns each player's king position in board scan order (by row, then by column), as the first king found in check or checkmate is the one reported."""
+        return sorted(self._kings.items(), key=lambda item: item[1].y * 8 + item[1].x)
+
+    def position_hash(self) -> int:
+        """Returns the hash of the nodes together with the side to move, castling rights and en-passant target."""
+        return self._hash ^ zobrist.state_hash(self.state)
 
     ############
     #   Info   #
@@ -364,11 +946,23 @@ class Board:
         This is the representation used when writing the game to a file.
 
         """
-        row_strings = []
-        for row in self.nodes:
-            row_string = "".join(node.canonical() for node in row)
-            row_strings.append(row_string)
-        return "\n".join(row_strings + [self.state.canonical()])
+        return "\n".join(self._canonical_rows() + [self.state.canonical()])
+
+    def _canonical_rows(self) -> List[str]:
+        """Returns the canonical strings of the rows of nodes.
+
+        The rows are cached against the hash of the nodes, which changes whenever a node does, so repeated calls on an unchanged position are a single comparison.
+        """
+        cache = self._rows_cache
+        if cache is not None and cache[0] == self._hash:
+            return cache[1]
+        nodes, codes = self._nodes, self._codes
+        rows = [
+            "".join([_NODE_STRS[nodes[sq]._flags][codes[sq]] for sq in range(y, y + 8)])
+            for y in range(0, 64, 8)
+        ]
+        self._rows_cache = (self._hash, rows)
+        return rows
 
     @overload
     def in_check(self) -> Union[Player, None]:
@@ -381,6 +975,8 @@ class Board:
     def in_check(self, player=None):
         """Determines if any player is in check
 
+        Prefer `in_check_any` or `is_in_check`, which this dispatches to.
+
         Arguments
         ----------
         player : Player, optional
@@ -391,15 +987,30 @@ class Board:
         Player|None
             The player in check, if any, or None
         """
-        in_check = []
-        for owner, king_pos in self.get_kings_pos().items():
-            if self.being_attacked_at(king_pos, owner.opponent()):
-                in_check.append(owner)
-                continue
         if player is None:
-            return in_check[0] if len(in_check) > 0 else None
-        else:
-            return player in in_check
+            return self.in_check_any()
+        return self.is_in_check(player)
+
+    def in_check_any(self) -> Union[Player, None]:
+        """Returns the first player found to be in check, or None if neither player is in check."""
+        for owner, _ in self._kings_in_scan_order():
+            if self.is_in_check(owner):
+                return owner
+        return None
+
+    def is_in_check(self, player: Player) -> bool:
+        """Determines whether the given player is in check.
+
+        Results are cached by the hash of the nodes, as whether a player is in check does not depend on the rest of the state.
+        """
+        key = (self._hash, player.value)
+        cached = _check_table.get(key)
+        if cached is not None:
+            return cached
+        king_pos = self._kings.get(player)
+        retval = king_pos is not None and self.is_attacked(king_pos, player.opponent())
+        _remember(_check_table, key, retval)
+        return retval
 
     @overload
     def checkmate(self) -> Union[Player, None]:
@@ -414,50 +1025,69 @@ class Board:
     ) -> Union[Player, None, bool]:
         """Determines if any player is in checkmate
 
+        Prefer `checkmate_any` or `is_checkmated`, which this dispatches to.
+
+        Arguments
+        ----------
+        player : Player, optional
+            The player to check for, if None, checks for any player, by default None
+
         Returns
         -------
-        Player|None
-            The player in checkmate, if any
+        Player|None|bool
+            The player in checkmate, if any, or whether `player` is in checkmate if given
         """
-        # get the king in check
-        player = self.in_check()
-        # if there is no king in check, return None
         if player is None:
-            return None if player is None else False
-
-        king_pos = self.get_kings_pos()[player]
+            return self.checkmate_any()
+        return self.is_checkmated(player)
+
+    def checkmate_any(self) -> Union[Player, None]:
+        """Returns the player in checkmate, if any, or None"""
+        # get the king in check, and the pieces attacking it
+        for player, king_pos in self._kings_in_scan_order():
+            attacking_positions = self.being_attacked_at(king_pos, player.opponent())
+            if attacking_positions:
+                break
+        else:
+            # if there is no king in check, return None
+            return None
+        return player if self._cannot_escape(player, king_pos, attacking_positions) else None
 
-        # pop the king out of the board so that it doesn't interfere with the check for check
-        popped_king = self[king_pos].contents
-        self[king_pos].contents = None
+    def is_checkmated(self, player: Player) -> bool:
+        """Determines whether the given player is in checkmate, regardless of the other player."""
+        king_pos = self._kings.get(player)
+        if king_pos is None:
+            return False
+        attacking_positions = self.being_attacked_at(king_pos, player.opponent())
+        return bool(attacking_positions) and self._cannot_escape(player, king_pos, attacking_positions)
 
+    def _cannot_escape(
+        self, player: Player, king_pos: Position, attacking_positions: Tuple[Position, ...]
+    ) -> bool:
+        """Determines whether `player`, whose king is attacked from `attacking_positions`, has no way out of check."""
         # check if the king can move out of check
-        for neighbour in self.get_neighbours(king_pos):
-            target = self[neighbour].contents
-            # check that the king is not moving into check again
-            if self.being_attacked_at(neighbour, player.opponent()):
-                continue
+        for neighbour in NEIGHBOURS[king_pos.y * 8 + king_pos.x]:
             # check that the king is not moving into a piece of the same colour
-            if target is not None and target.owner == player:
+            if self._codes[neighbour.y * 8 + neighbour.x] * player.value > 0:
                 continue
-            # if the king can move out of check, return None
-            # put the king back
-            self[king_pos].contents = popped_king
-            return None
-        # put the king back
-        self[king_pos].contents = popped_king
+            # check that the king is not moving into check again, ignoring the king so that it doesn't block the check
+            if self.is_attacked(neighbour, player.opponent(), ignore=king_pos):
+                continue
+            # if the king can move out of check, it is not checkmate
+            return False
 
         # king cannot move out of check, check if any pieces can block the check
-        attacking_positions = self.being_attacked_at(king_pos, player.opponent())
         # check if a wall can block the check
         if self.state.walls[player] > 0 and len(attacking_positions) == 1:
             delta = (attacking_positions[0] - king_pos).norm()
             # cardinal motion can always be blocked by a wall
             if delta.x == 0 or delta.y == 0:
-                return None
+                return False
             # diagonal can only be blocked if a wall already exists somewhere between the attacker and the king
-            elif any(self[tile].walls for tile in self.get_between(king_pos, attacking_positions[0])):
-                return None
+            elif LINES_TO[king_pos.y * 8 + king_pos.x][
+                attacking_positions[0].y * 8 + attacking_positions[0].x
+            ] & (self._walls[0] | self._walls[1] | self._walls[2] | self._walls[3]):
+                return False
 
         for attacker in attacking_positions:
             # get the line between the attacker and the king
@@ -465,24 +1095,22 @@ class Board:
             # get the run of the line
             run = self.get_run(line)
             # get all the pieces belonging to the player on the board
-            pieces = [
-                pos
-                for pos in run
-                if self[pos].contents is not None and self[pos].contents.owner == player
-            ]
+            sign = player.value
+            codes = self._codes
+            pieces = [pos for pos in run if codes[pos.y * 8 + pos.x] * sign > 0]
             # check if any pieces can block the run
             # for each piece
             for piece in pieces:
                 moves = self.get_moves(piece)
                 # check if the piece can capture the attacker
                 if attacker in moves:
-                    return None
+                    return False
                 # check if the piece can block the run
                 for pos in run:
                     if pos in moves:
-                        return None
+                        return False
         # player is in checkmate
-        return player or True
+        return True
 
     def stalemate(self) -> Union[Player, None]:
         """Returns whether the game is in stalemate
@@ -498,18 +1126,21 @@ class Board:
         # check if the player has any valid moves
         # the list of playesr that need to be checked
         players = [Player.WHITE, Player.BLACK]
-        for y, row in enumerate(self):
-            for x, node in enumerate(row):
-                # check that the node is not empty, and that the piece belongs to a player that has not already been checked
-                if node.contents is None or node.contents.owner not in players:
-                    continue
-                # check if the piece has any valid moves
-                if len(self.get_moves(P(x, y))) > 0:
-                    # if so, remove the player from the list
-                    players.remove(node.contents.owner)
-                    if not players:
-                        # if there are no players left, return None
-                        return None
+        get_moves = self.get_moves
+        for sq, code in enumerate(self._codes):
+            # check that the node is not empty, and that the piece belongs to a player that has not already been checked
+            if code == 0:
+                continue
+            owner = Player.WHITE if code < 0 else Player.BLACK
+            if owner not in players:
+                continue
+            # check if the piece has any valid moves
+            if get_moves(SQUARES[sq]):
+                # if so, remove the player from the list
+                players.remove(owner)
+                if not players:
+                    # if there are no players left, return None
+                    return None
 
         # return the player in stalemate
         return players[0]
@@ -521,10 +1152,11 @@ class Board:
 
     def being_attacked_at(
         self, position: Position, attacking_player: Player
-    ) -> List[Position]:
+    ) -> Tuple[Position, ...]:
         """Check whether a position is being attacked by a piece belonging to `attacking_player.
 
-        Returns a list of the positions of the pieces attacking the position.
+        Returns the positions of the pieces attacking the position.
+        Results are cached by the hash of the board, so the returned tuple is shared between calls.
 
         Parameters
         ----------
@@ -535,117 +1167,119 @@ class Board:
 
         Returns
         -------
-        List[Position]
+        Tuple[Position, ...]
             The attacking positions.
         """
+        key = (self._hash, position.x, position.y, attacking_player.value)
+        cached = _attack_table.get(key)
+        if cached is not None:
+            return cached
 
-        def _get_attacker(run: List[Position], pieces: Tuple) -> List[Position]:
-            for pos in run[
-                1:
-            ]:  # slicing to avoid the first position, which is the position being checked
-                opp = self[pos].contents
-                if opp is None:  # empty node, keep going
-                    continue
-                elif opp.owner == attacking_player and isinstance(
-                    opp, pieces
-                ):  # enemy piece, stop as it blocks the run
-                    return [pos]
-                else:  # friendly piece, stop as it blocks the run
-                    break
-            return []
+        attackers = self._attackers(position, attacking_player)
+        positions: List[Position] = []
+        while attackers:
+            bit = attackers & -attackers
+            positions.append(SQUARES[bit.bit_length() - 1])
+            attackers ^= bit
 
+        retval = tuple(positions)
+        _remember(_attack_table, key, retval)
+        return retval
 
-        positions: List[Position] = []
-        # immediate neighbours
-        neighbours = self.get_neighbours(position)
-        for neighbour in neighbours:
-            target = self[neighbour].contents
-            # check for kings
-            if isinstance(target, King) and target.owner == attacking_player:
-                positions.append(neighbour)
-            # check for pawns
-            if isinstance(target, Pawn) and target.owner == attacking_player:
-                delta = neighbour - position
-                # check that the pawn is attacking from the correct direction TODO: confirm logic here is correct
-                if target.owner.value * delta.y == -1 and abs(delta.x) == 1:
-                    positions.append(neighbour)
-
-        straights: List[List[Position]] = []
-        # vertical and horizontal lines
-        straights.append(
-            self.get_run(
-                self.get_line(position, P(1, 0), allow_pieces=attacking_player)
-            )
-        )
-        straights.append(
-            self.get_run(
-                self.get_line(position, P(-1, 0), allow_pieces=attacking_player)
-            )
-        )
-        straights.append(
-            self.get_run(
-                self.get_line(position, P(0, 1), allow_pieces=attacking_player)
-            )
-        )
-        straights.append(
-            self.get_run(
-                self.get_line(position, P(0, -1), allow_pieces=attacking_player)
-            )
-        )
-        for straight in straights:
-            positions.extend(_get_attacker(straight, (Queen, Rook)))
-
-        diags = []
-        # diagonal lines
-        diags.append(
-            self.get_run(
-                self.get_line(position, P(1, 1), allow_pieces=attacking_player)
-            )
-        )
-        diags.append(
-            self.get_run(
-                self.get_line(position, P(-1, -1), allow_pieces=attacking_player)
-            )
-        )
-        diags.append(
-            self.get_run(
-                self.get_line(position, P(1, -1), allow_pieces=attacking_player)
-            )
-        )
-        diags.append(
-            self.get_run(
-                self.get_line(position, P(-1, 1), allow_pieces=attacking_player)
-            )
-        )
-        for diag in diags:
-            positions.extend(_get_attacker(diag, (Queen, Bishop)))
-
-        bends = []
-        # knight moves
-        for offset in Knight.offsets:
-            pot_pos = position + offset
-            if Board.on_board(pot_pos):
-                bends.append(pot_pos)
-        for bend in bends:
-            target = self[bend].contents
-            if isinstance(target, Knight) and target.owner == attacking_player:
-                positions.append(bend)
-
-        return positions
+    def is_attacked(
+        self,
+        position: Position,
+        attacking_player: Player,
+        ignore: Union[Position, None] = None,
+    ) -> bool:
+        """Determines whether a position is being attacked by any piece belonging to `attacking_player`.
+
+        Cheaper than `being_attacked_at` when only a yes/no answer is needed, as it stops at the first attacker found.
+
+        Parameters
+        ----------
+        position : Position
+            The position to check for attacks on.
+        attacking_player : Player
+            The player to check for attacks from.
+        ignore : Position, optional
+            A position whose contents are treated as absent, e.g. a king considering where to move, by default None
+        """
+        return self._attackers(position, attacking_player, first=True, ignore=ignore) != 0
+
+    def _attackers(
+        self,
+        position: Position,
+        attacking_player: Player,
+        first: bool = False,
+        ignore: Union[Position, None] = None,
+    ) -> int:
+        """Returns the bitboard of the pieces belonging to `attacking_player` that attack a position.
+
+        If `first` is set, returns as soon as any attacker is found, so the bitboard may be incomplete.
+        If `ignore` is given, the piece on that position neither attacks nor blocks.
+        """
+        if not Board.on_board(position):
+            return 0
+        sq = position.y * 8 + position.x
+        sign = attacking_player.value
+        bitboards = self._bitboards
+        occupied = self._occupied
+        if ignore is not None:
+            keep = ~(1 << (ignore.y * 8 + ignore.x))
+            bitboards = {code: bb & keep for code, bb in bitboards.items()}
+            occupied &= keep
+
+        # immediate neighbours and knight moves, which ignore walls
+        attackers = KING_ATTACKS[sq] & bitboards.get(King.type_index * sign, 0)
+        attackers |= PAWN_ATTACKERS[sign][sq] & bitboards.get(Pawn.type_index * sign, 0)
+        attackers |= KNIGHT_ATTACKS[sq] & bitboards.get(Knight.type_index * sign, 0)
+        if first and attackers:
+            return attackers
+
+        queens = bitboards.get(Queen.type_index * sign, 0)
+        # the attacking pieces for each kind of movement
+        straight_attackers = queens | bitboards.get(Rook.type_index * sign, 0)
+        diagonal_attackers = queens | bitboards.get(Bishop.type_index * sign, 0)
+        if not straight_attackers | diagonal_attackers:
+            return attackers
+
+        # lines, which stop at the first piece or wall
+        stops = self._get_wall_stops()
+        for direction, ray_masks in RAY_MASKS.items():
+            candidates = straight_attackers if 0 in direction else diagonal_attackers
+            # only scan rays that hold a piece which could attack along them
+            if not ray_masks[sq] & candidates:
+                continue
+            stop = stops[direction]
+            if stop >> sq & 1:
+                # blocked from leaving the position
+                continue
+            blockers = ray_masks[sq] & (occupied | stop)
+            if not blockers:
+                continue
+            # the nearest blocker is the lowest bit for rays running up the board, and the highest otherwise
+            if direction[1] * 8 + direction[0] > 0:
+                nearest = blockers & -blockers
+            else:
+                nearest = 1 << (blockers.bit_length() - 1)
+            attackers |= nearest & candidates
+            if first and attackers:
+                break
+        return attackers
 
     def get_kings_pos(self) -> Dict[Player, Position]:
-        kings: dict = {}
-        for y, row in enumerate(self):
-            for x, node in enumerate(row):
-                inner = node.contents
-                if isinstance(inner, King):
-                    kings[inner.owner] = P(x, y)
-        return kings
+        """Returns the position of each player's king.
 
-    def get_moves(self, position: Position, strict=False) -> List[Position]:
-        """Returns a list of all the moves a piece at the given position could make.
+        The returned dict is the board's own cache, and must not be modified.
+        """
+        return self._kings
+
+    def get_moves(self, position: Position, strict=False) -> Tuple[Move, ...]:
+        """Returns all the moves a piece at the given position could make.
 
         Does not take context into account (i.e. whether the move would put the player in check etc.).
+        Results are cached by the position hash of the board, so the returned tuple is shared between calls (and between boards in the same position).
 
         Parameters
         ----------
@@ -654,55 +1288,66 @@ class Board:
 
         Returns
         -------
-        List[Position]
-            The list of positions the piece could move to.
+        Tuple[Move, ...]
+            The moves the piece could make.
         """
-        actor = self[position].contents
+        actor = self._nodes[position.y * 8 + position.x].contents
         if actor is None:
-            return []
+            return ()
         player = actor.owner
-        # if the piece is not owned by the current player, return an empty list
+        # if the piece is not owned by the current player, return nothing
         if strict and player != self.state.player:
-            return []
+            return ()
 
-        potentials: List[Move] = []
+        key = (self.position_hash(), position.x, position.y)
+        cached = _move_table.get(key)
+        if cached is not None:
+            return cached
+
+        # simulate each potential move to see if it is legal
+        retval = tuple(
+            potential
+            for potential in self._pseudo_moves(position, actor)
+            if self._is_legal(potential, player)
+        )
+        _remember(_move_table, key, retval)
+        return retval
 
-        def get_potentials(pos: Position, directions: List[Move]):
+    def _pseudo_moves(self, position: Position, actor: Piece) -> List[Move]:
+        """Returns the moves the piece `actor` at the given position could make, before checking whether they leave its king in check."""
+        player = actor.owner
+        potentials: List[Move] = []
+        # work in square indices, reading pieces from the code list and walls from the stop bitboards
+        sq = position.y * 8 + position.x
+        sign = player.value
+        codes = self._codes
+        occupied = self._occupied
+        stops = self._get_wall_stops()
+
+        def get_potentials(pos: Position, directions: Tuple[Position, ...]):
             positions = []
-            runs = {}
+            origin = pos.y * 8 + pos.x
             for direction in directions:
-                runs[direction] = self.get_line(pos, direction)
-                # runs[direction] = []
-                # line = self.get_line(pos, direction)
-                # if not line: # skip zero length lines
-                #     continue
-                # elif len(line) > 1: # if the line is longer than 1, get the run
-                #     runs[direction].extend(self.get_run(line))
-                # elif not self.wall_blocked(pos, direction): # if the line is 1 long, check if that position is blocked by a wall
-                #     runs[direction].extend(line)
-
-            for direction, run in runs.items():
-                for i, (posA, posB) in enumerate(zip(run, run[1:])):
-                    target = self[posB].contents
-                    if not self.wall_blocked(posA, posB - posA):
-                        if target and target.owner == player:
-                            break
-                        elif target:
-                            positions.append(posB)
-                            break
-                        else:
-                            positions.append(posB)
-                    else:
-                        break
-                # for pos in run:
-                #     opp = self[pos].contents
-                #     if opp is None:
-                #         positions.append(pos)
-                #     elif opp.owner != player:
-                #         positions.append(pos)
-                #         break
-                #     else:
-                #         break
+                key = (direction.x, direction.y)
+                stop = stops[key]
+                if stop >> origin & 1:
+                    # blocked from leaving the position
+                    continue
+                ray = RAYS[key][origin]
+                # the line ends at the first piece, or the first square a wall stops it leaving
+                blockers = RAY_MASKS[key][origin] & (occupied | stop)
+                if not blockers:
+                    positions.extend(ray[1:])
+                    continue
+                # the nearest blocker is the lowest bit for rays running up the board, and the highest otherwise
+                step = key[1] * 8 + key[0]
+                if step > 0:
+                    nearest = (blockers & -blockers).bit_length() - 1
+                else:
+                    nearest = blockers.bit_length() - 1
+                # a friendly piece cannot be captured, an enemy piece can
+                end = (nearest - origin) // step + (codes[nearest] * sign <= 0)
+                positions.extend(ray[1:end])
             return positions
 
         ###########################################################
@@ -714,45 +1359,37 @@ class Board:
             movetype = (
                 SemiPromotion if position.y == int(3.6 + 2.5 * player.value) else Move
             )
-            # single move forward
-            front = position + P(0, player.value)
-            if (
-                Board.on_board(front)
-                and self[front].contents is None
-                and not self.wall_blocked(position, front - position)
-            ):
-                potentials.append(movetype(player, position, front))
+            # single move forward (a step blocked by a wall or the edge of the board is in the stops)
+            front = position + P(0, sign)
+            front_sq = sq + sign * 8
+            if not stops[(0, sign)] >> sq & 1 and codes[front_sq] == 0:
+                potentials.append(movetype(player, position, SQUARES[front_sq]))
                 # double move forward
-                dfront = position + P(0, player.value * 2)
+                dfront_sq = front_sq + sign * 8
                 if (
-                    Board.on_board(dfront)
-                    and self[dfront].contents is None
-                    and position.y == int(3.6 - 2.5 * player.value)
-                    and not self.wall_blocked(front, dfront - front)
+                    position.y == int(3.6 - 2.5 * player.value)
+                    and not stops[(0, sign)] >> front_sq & 1
+                    and codes[dfront_sq] == 0
                 ):
-                    potentials.append(Move(player, position, dfront))
+                    potentials.append(Move(player, position, SQUARES[dfront_sq]))
 
             # diagonal moves
-            for x_off in [P(x, 0) for x in (-1, 1)]:
-                target = front + x_off
-                if Board.on_board(target) and not self.wall_blocked(
-                    position, target - position
-                ):
-                    opp = self[target].contents
-                    if opp is not None and opp.owner != player:
-                        potentials.append(movetype(player, position, target))
+            for x_off in PAWN_DIAGS:
+                if not stops[(x_off.x, sign)] >> sq & 1:
+                    target_sq = front_sq + x_off.x
+                    # only captures of opposing pieces
+                    if codes[target_sq] * sign < 0:
+                        potentials.append(movetype(player, position, SQUARES[target_sq]))
 
             # en passant
             if self.state.enpassant is not None and self.state.enpassant.y == front.y:
-                for x_off in [P(x, 0) for x in (-1, 1)]:
+                for x_off in PAWN_DIAGS:
                     target = front + x_off
                     if (
                         Board.on_board(target)
                         and target == self.state.enpassant
-                        and (
-                            self[target].contents is None
-                            or self[target].contents.owner != player
-                        )
+                        # empty, or an opposing piece
+                        and codes[target.y * 8 + target.x] * sign <= 0
                     ):
                         potentials.append(Move(player, position, target))
 
@@ -761,20 +1398,17 @@ class Board:
         ###########################################################
 
         elif isinstance(actor, Knight):
-            for offset in Knight.offsets:
-                pot_pos = position + offset
-                if Board.on_board(pot_pos):
-                    opp = self[pot_pos].contents
-                    if opp is None or opp.owner != player:
-                        potentials.append(Move(player, position, pot_pos))
+            for pot_pos in KNIGHT_TARGETS[sq]:
+                # empty, or an opposing piece
+                if codes[pot_pos.y * 8 + pot_pos.x] * sign <= 0:
+                    potentials.append(Move(player, position, pot_pos))
 
         ###########################################################
         #                       BISHOPS                           #
         ###########################################################
 
         elif isinstance(actor, Bishop):
-            directions = [P(x, y) for x in (-1, 1) for y in (-1, 1)]
-            potential_targets = get_potentials(position, directions)
+            potential_targets = get_potentials(position, BISHOP_DIRS)
             potentials.extend(
                 Move(player, position, target) for target in potential_targets
             )
@@ -784,10 +1418,7 @@ class Board:
         ###########################################################
 
         elif isinstance(actor, Rook):
-            directions = [
-                P(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if abs(x) != abs(y)
-            ]
-            potential_targets = get_potentials(position, directions)
+            potential_targets = get_potentials(position, ROOK_DIRS)
             potentials.extend(
                 Move(player, position, target) for target in potential_targets
             )
@@ -797,10 +1428,7 @@ class Board:
         ###########################################################
 
         elif isinstance(actor, Queen):
-            directions = [
-                P(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if (x, y) != (0, 0)
-            ]
-            potential_targets = get_potentials(position, directions)
+            potential_targets = get_potentials(position, QUEEN_DIRS)
             potentials.extend(
                 Move(player, position, target) for target in potential_targets
             )
@@ -810,23 +1438,20 @@ class Board:
         ###########################################################
 
         elif isinstance(actor, King):
-            for neighbour in self.get_neighbours(position):
-                target = self[neighbour].contents
-                if (target is None or target.owner != player) and not self.wall_blocked(
-                    position, neighbour - position
-                ):
-                    potentials.append(Move(player, position, neighbour))
+            for direction in KING_DIRS:
+                # blocked by a wall or the edge of the board
+                if stops[(direction.x, direction.y)] >> sq & 1:
+                    continue
+                target_sq = sq + direction.y * 8 + direction.x
+                # empty, or an opposing piece
+                if codes[target_sq] * sign <= 0:
+                    potentials.append(Move(player, position, SQUARES[target_sq]))
             # remove moves that would put the king in check
-            # pop the king out of the board so that it doesn't interfere with the check for check
-            tmp = self[position].contents
-            self[position].contents = None
             for i, move in enumerate(potentials):
-                # check if the king would be in check after the move
-                if self.being_attacked_at(move.destination, player.opponent()):
+                # check if the king would be in check after the move, ignoring the king so that it doesn't block the check
+                if self.is_attacked(move.destination, player.opponent(), ignore=position):
                     potentials.pop(i)
                     break
-            # put the king back
-            self[position].contents = tmp
 
             # castling
             # very long logic checks the following (in this order):
@@ -834,40 +1459,59 @@ class Board:
             #   -: There are no walls blocking the castling
             #   -: None of the positions between the king and the rook are being attacked
             #   -: There are no pieces between the king and the rook
-            if self.state.castling[player]["king"] and all(
-                self[pos].contents is None
-                for pos in [position + P(1, 0), position + P(2, 0)]
-                if self.on_board(pos)
-                and not self.wall_blocked(position, pos - position)
-                and not self.being_attacked_at(pos, player.opponent())
-            ):
-                potentials.append(KingCastle(player))
-            if self.state.castling[player]["queen"] and all(
-                self[pos].contents is None
-                for pos in [
-                    position + P(-1, 0),
-                    position + P(-2, 0),
-                    position + P(-3, 0),
-                ]
-                if self.on_board(pos)
-                and not self.wall_blocked(position, pos - position)
-                and not self.being_attacked_at(pos, player.opponent())
-            ):
-                potentials.append(QueenCastle(player))
+            # squares behind a wall on the king's node, or under attack, are exempt from being empty,
+            # so only the occupied squares of an open path need an attack test
+            rights = CASTLING_RIGHTS[player]
+            for side, castle, step in (("king", KingCastle, (1, 0)), ("queen", QueenCastle, (-1, 0))):
+                if not self.state.castling & rights[side]:
+                    continue
+                blocking = 0 if stops[step] >> sq & 1 else CASTLE_PATHS[side][sq] & self._occupied
+                while blocking:
+                    bit = blocking & -blocking
+                    if not self.is_attacked(SQUARES[bit.bit_length() - 1], player.opponent()):
+                        break
+                    blocking ^= bit
+                else:
+                    potentials.append(castle(player))
 
-        # simulate each potential move to see if it is legal
-        danger = self.in_check(player)
-        for potential in potentials[:]:
-            move_res = self.apply_move(potential)
-            if isinstance(move_res, Failure):
-                potentials.remove(potential)
+        return potentials
+
+    def _is_valid_move(self, move: Move) -> bool:
+        """Determines whether a move is one of `get_moves(move.origin)`.
+
+        Only simulates the potential moves that match `move`, rather than every potential move of the piece.
+        Results are cached by position hash, as the same move is often validated again in the same position.
+        The cache is shared between boards, so the hash must cover everything the result depends on (including the full en-passant target square).
+        """
+        position_hash = self.position_hash()
+        key = (position_hash, move.__class__, move.player, move.origin, move.destination)
+        cached = _validity_table.get(key)
+        if cached is not None:
+            return cached
+        actor = self._nodes[move.origin.y * 8 + move.origin.x].contents
+        if actor is None:
+            retval = False
+        else:
+            moves = _move_table.get((position_hash, move.origin.x, move.origin.y))
+            if moves is not None:
+                retval = move in moves
             else:
-                dummy = move_res.unwrap()
-                if dummy.in_check(player):
-                    potentials.remove(potential)
+                # matches the comparison made by `move in moves`
+                retval = any(
+                    self._is_legal(potential, actor.owner)
+                    for potential in self._pseudo_moves(move.origin, actor)
+                    if move is potential or move == potential
+                )
+        _remember(_validity_table, key, retval)
+        return retval
 
-        # return the list of potentials
-        return potentials
+    def _is_legal(self, move: Move, player: Player) -> bool:
+        """Determines whether applying a move succeeds without leaving `player` in check."""
+        undo = self.make_move(move)
+        try:
+            return not self.is_in_check(player)
+        finally:
+            self.unmake_move(undo)
 
     def wall_blocked(self, position: Position, direction: Position) -> bool:
         """Determines whether a wall blocks movement in the given direction from the given position.
@@ -914,33 +1558,22 @@ class Board:
             #   c  \d
             #
             # get the motion in terms of walls
-            #        (hori wall, vert wall)
-            motion = (Wall(0), Wall(0))
-            if direction.y < 0:  # South
-                if direction.x > 0:  # East
-                    motion = Wall.SOUTH, Wall.EAST
-                else:  # West
-                    motion = Wall.SOUTH, Wall.WEST
-            else:  # North
-                if direction.x > 0:  # East
-                    motion = Wall.NORTH, Wall.EAST
-                else:  # West
-                    motion = Wall.NORTH, Wall.WEST
-            inv_motion = tuple(map(Wall.alternate, motion))
-
-            to_node = self[to_pos]
+            hori, vert, inv_hori, inv_vert = _DIAGONAL_MOTION[(direction.x > 0, direction.y > 0)]
+
+            from_walls = from_node.walls
+            to_walls = self[to_pos].walls
             # check for walls
             # check for from_node having both motion walls
-            if from_node.walls & motion[0] and from_node.walls & motion[1]:
+            if from_walls & hori and from_walls & vert:
                 return True
             # from_node has horizontal motion wall, and horizontal neighbour has that same wall
-            elif from_node.walls & motion[0] and self[hori_alt].walls & motion[0]:
+            elif from_walls & hori and self[hori_alt].walls & hori:
                 return True
             # from_node has vertical motion wall, and vertical neighbour has that same wall
-            elif from_node.walls & motion[1] and self[vert_alt].walls & motion[1]:
+            elif from_walls & vert and self[vert_alt].walls & vert:
                 return True
             # to_node has inverses of both motion walls
-            elif to_node.walls & inv_motion[0] and to_node.walls & inv_motion[1]:
+            elif to_walls & inv_hori and to_walls & inv_vert:
                 return True
         return False
 
@@ -967,8 +1600,8 @@ class Board:
         """
         # get the direction of the movement
         direction = (end-start).norm()
-        # get the line between the two positions
-        line = self.get_line(start, direction)
+        # get the line between the two positions, copied as it is trimmed in place
+        line = list(self.get_line(start, direction))
         if line:
             # remove positions past the end
             while line[-1] != end:
@@ -987,9 +1620,9 @@ class Board:
     ) -> List[Position]:
         """Returns a list of the coordinates of the nodes along the given direction starting from the origin.
 
-        The origin is not included in the list.
+        The origin is included in the list (if it is on the board).
 
-        The list is truncated if it reaches the edge of the board, or if it encounters a wall/piece.
+        The list is truncated when it reaches the edge of the board; walls and pieces are not considered (see `get_run`).
 
         Parameters
         ----------
@@ -1002,16 +1635,21 @@ class Board:
         -------
         list
             The coordinates of the nodes along the line.
+            Lines along the queen directions come from `RAYS` and are shared, so must not be modified.
         """
+        ray = RAYS.get((direction.x, direction.y))
+        if ray is not None and Board.on_board(origin):
+            return ray[origin.y * 8 + origin.x]
+        if not (direction.x or direction.y):
+            # a null direction never leaves the origin
+            return [origin] if Board.on_board(origin) else []
         # generate a list of the coordinates of the nodes along the line
         base = []
-        i = 1
+        append = base.append
         line_pos = origin
-        while Board.on_board(line_pos):
-            base.append(line_pos)
-            i += 1
-            line_pos += direction
-        # get the run of the line
+        while 0 <= line_pos.x < 8 and 0 <= line_pos.y < 8:
+            append(line_pos)
+            line_pos = line_pos + direction
         return base
 
     def get_run(self, positions: List[Position]) -> List[Position]:
@@ -1034,16 +1672,22 @@ class Board:
         run = []
         # get each pair of positions
         delta = (positions[1] - positions[0]).norm()
+        # a unit step from an on-board position is blocked exactly when its bit is in the stops
+        stop = self._get_wall_stops().get((delta.x, delta.y))
         for pos in positions:
             run.append(pos)
-            if self.wall_blocked(pos, delta):
+            if (
+                stop >> (pos.y * 8 + pos.x) & 1
+                if stop is not None and 0 <= pos.x < 8 and 0 <= pos.y < 8
+                else self.wall_blocked(pos, delta)
+            ):
                 # if the movement is blocked, return the run
                 return run
         # return the run
         return run
 
-    def get_neighbours(self, position: Position) -> List[Position]:
-        """Returns a list of all the neighbours of position that are on the board.
+    def get_neighbours(self, position: Position) -> Tuple[Position, ...]:
+        """Returns all the neighbours of position that are on the board.
 
         Parameters
         ----------
@@ -1052,9 +1696,11 @@ class Board:
 
         Returns
         -------
-        list
+        Tuple[Position, ...]
             The neighbours of that position
         """
+        if Board.on_board(position):
+            return NEIGHBOURS[position.y * 8 + position.x]
         potential_neighbours = [
             Position(*x)
             for x in [
@@ -1068,58 +1714,12 @@ class Board:
                 (position.x - 1, position.y + 1),
             ]
         ]
-        return [node for node in potential_neighbours if self.on_board(node)]
+        return tuple(node for node in potential_neighbours if self.on_board(node))
 
     ############
     #  Strings #
     ############
 
-    @staticmethod
-    def _board_list_transform(strs: list) -> list:
-        """Transforms the board lines into a 3D array of characters,
-        such that each coordinate holds a list containing the specifier for that node
-        and then the modifiers for that node
-        """
-        lines: list = []
-        for line in strs[:8]:
-            mod_list: list = []
-            new_line: list = []
-            # append a dummy character to absorb any trailing modifiers
-            for board_char in f"{line}#":
-                # if the character is a modifier, add it to the modifier list
-                if board_char in ["|", "_"]:
-                    mod_list.append(board_char)
-                    continue
-
-                # add the character to the new line
-                new_line.append([board_char] + mod_list)
-
-                # clear the modifier list
-                mod_list = []
-            lines.append(new_line)
-        return lines
-
-    @staticmethod
-    def _apply_node_modifiers(pos: Position, node: BoardNode, mods: list) -> Result:
-        """Applies a list of modifiers to the supplied node"""
-        for modifier in mods:
-            # west wall
-            if modifier == "|":
-                node.walls |= Wall.WEST
-                # check that the wall is not on the west edge of the board
-                if pos.x == 0:
-                    return Failure()
-            # south wall
-            elif modifier == "_":
-                node.walls |= Wall.SOUTH
-                # check that the wall is not on the south edge of the board
-                if pos.y == 7:
-                    return Failure()
-            else:
-                # if the modifier is not recognised, raise an error
-                return Failure()
-        return Success(None)
-
     @classmethod
     def from_strs(cls, strings: list, _init=False) -> Result["Board"]:
         """Returns a board that is in the state described by the given list of strings.
@@ -1128,63 +1728,49 @@ class Board:
         It also should not contain any empty lines in the strings.
         """
         # check if the board is in standard starting positions
-        if all(a == b for a, b in lzip(strings, cls.standard_board_str)) and not _init:
+        if not _init and tuple(strings) == cls._standard_board_lines:
             # Return a standard board in the standard starting positions
             return cls.standard_board()
 
-        # Transform the strings
-        lines = cls._board_list_transform(strings)
-
-        # create the board from the lines
+        # create the board from the lines in a single scan of each line,
+        # collecting the modifiers that precede each specifier as a set of walls
         board = []
-        for y, row_list in enumerate(lines):
-            # append a new row to the board
-            board.append([])
-            # Create a node for each character in the line
-            for x, board_chars in enumerate(row_list):
-                # if its the dummy character
-
-                if board_chars[0] == "#":
-                    # we've reached the end of the line, but if its not the ninth position
-                    if x != 8:
-                        # return a Failure at the last correct node
-                        return Failure(
-                            Error.ILLEGAL_BOARD
-                            % Position(min(x, len(row_list)), y).canonical()
-                        )
-                    # else if there are modifiers on the dummy (i.e. there are trailing modifiers)
-                    elif len(board_chars) > 1:
-                        # return a failure on the right edge of the board
-                        return Failure(Error.ILLEGAL_BOARD % Position(7, y).canonical())
-
-                    # skip further processing, as we have reached the end of the line
+        for y, line in enumerate(strings[:8]):
+            row = []
+            walls = 0
+            repeated = False
+            for char in line:
+                wall = _WALL_MODIFIERS.get(char)
+                if wall is not None:
+                    # a modifier may only be given once per node
+                    repeated |= bool(walls & wall)
+                    walls |= wall
                     continue
-                # if its not the dummy char, check that the line is not too long
-                elif x > 7:
+                x = len(row)
+                # check that the line is not too long
+                if x > 7:
                     return Failure(Error.ILLEGAL_BOARD % Position(7, y).canonical())
-
-                # Attempt to create the node from the character
-                new_node_result: Result = BoardNode.from_str(board_chars[0])
-                if isinstance(new_node_result, Failure):
-                    return Failure(Error.ILLEGAL_BOARD % Position(x, y).canonical())
-                # Node creation succeeded, unwrap result
-                new_node: BoardNode = new_node_result.unwrap()
-
-                # check for duplicate modifiers or too many modifiers
-                if len(board_chars) > 3 or (
-                    len(board_chars) == 3 and board_chars[1] == board_chars[2]
-                ):
-                    return Failure(Error.ILLEGAL_BOARD % Position(x, y).canonical())
-
-                # Attempt to apply the modifiers to the new node
-                mod_result = cls._apply_node_modifiers(
-                    Position(x, y), new_node, board_chars[1:]
-                )
-                if isinstance(mod_result, Failure):
+                template = _NODE_TEMPLATES.get(char)
+                if template is None or repeated:
                     return Failure(Error.ILLEGAL_BOARD % Position(x, y).canonical())
-
-                # append the node to the end of the row
-                board[-1].append(new_node)
+                if walls:
+                    # check that the walls are not on the west or south edge of the board
+                    if (walls & Wall.WEST.value and x == 0) or (walls & Wall.SOUTH.value and y == 7):
+                        return Failure(Error.ILLEGAL_BOARD % Position(x, y).canonical())
+                    node = template.clone()
+                    node._flags |= walls << _WALLS_SHIFT
+                    walls = 0
+                else:
+                    # the shared empty node is never modified, so need not be copied
+                    node = template if template is EMPTY_NODE else template.clone()
+                row.append(node)
+            # check that the line is not too short
+            if len(row) != 8:
+                return Failure(Error.ILLEGAL_BOARD % Position(len(row), y).canonical())
+            # check that there are no trailing modifiers
+            if walls:
+                return Failure(Error.ILLEGAL_BOARD % Position(7, y).canonical())
+            board.append(row)
 
         state_result = BoardState.from_str(strings[8])
         if isinstance(state_result, Failure):
@@ -1220,24 +1806,27 @@ class Board:
 
         Called automatically when the board is created, but will not fail if called multiple times.
         """
-        # normalise the board walls
-        for y, row in enumerate(self.nodes):
-            for x, node in enumerate(row):
-                if node.walls & Wall.WEST:
-                    # if this node has a west wall, the node to the west must have an east wall
-                    self.nodes[y][x - 1].walls |= Wall.EAST
-
-                if node.walls & Wall.SOUTH:
-                    # if this node has a south wall, the node to the south must have a north wall
-                    self.nodes[y - 1][x].walls |= Wall.NORTH
-
-                if node.walls & Wall.NORTH:
-                    # if this node has a north wall, the node to the north must have a south wall
-                    self.nodes[y + 1][x].walls |= Wall.SOUTH
-
-                if node.walls & Wall.EAST:
-                    # if this node has an east wall, the node to the east must have a west wall
-                    self.nodes[y][x + 1].walls |= Wall.WEST
+        north, south, east, west = self._walls
+        # a south wall implies a north wall on the node to the south, and vice versa
+        north |= south >> 8
+        south |= (north << 8) & _FULL
+        # a west wall implies an east wall on the node to the west, and vice versa
+        # masking out the walls that would wrap round onto the opposite edge of the board
+        east |= (west >> 1) & NOT_FILE_H
+        west |= (east << 1) & NOT_FILE_A
+
+        # add the missing walls to the nodes
+        for wall, old, new in zip(
+            (Wall.NORTH, Wall.SOUTH, Wall.EAST, Wall.WEST),
+            self._walls,
+            (north, south, east, west),
+        ):
+            added = old ^ new
+            while added:
+                bit = added & -added
+                pos = SQUARES[bit.bit_length() - 1]
+                self.set_walls(pos, self[pos].walls | wall)
+                added ^= bit
 
     def standardise_status(self):
         """Standardises the status of the board, such that castling rights are correct, and the current player is white."""
@@ -1245,20 +1834,14 @@ class Board:
         self.state.player = Player.WHITE
 
         # set the castling rights
-        self.state.castling = {
-            Player.WHITE: {
-                "king": self[P(4, 0)].contents is King
-                and self[P(0, 0)].contents is Rook,
-                "queen": self[P(4, 0)].contents is King
-                and self[P(7, 0)].contents is Rook,
-            },
-            Player.BLACK: {
-                "king": self[P(4, 7)].contents is King
-                and self[P(0, 7)].contents is Rook,
-                "queen": self[P(4, 7)].contents is King
-                and self[P(7, 7)].contents is Rook,
-            },
-        }
+        castling = 0
+        for player, y in ((Player.WHITE, 0), (Player.BLACK, 7)):
+            if self[P(4, y)].contents is King:
+                if self[P(0, y)].contents is Rook:
+                    castling |= CASTLING_RIGHTS[player]["king"]
+                if self[P(7, y)].contents is Rook:
+                    castling |= CASTLING_RIGHTS[player]["queen"]
+        self.state.castling = castling
 
     def validate_move(self, move: Move) -> Result[Move]:
         """Validates the supplied move against this board, returning a Failure if the move is invalid, and a Success otherwise.
@@ -1274,55 +1857,57 @@ class Board:
             The result of vaildation
         """
         # check that the move starts/end on the board
-        if not all(0 <= x <= 7 for x in tuple(move.origin) + tuple(move.destination)):
-            return Failure(Error.ILLEGAL_MOVE % move.canonical())
+        # any coordinate outside 0-7 (including a negative one) has a bit set above the lowest three
+        origin, dest = move.origin, move.destination
+        if (origin.x | origin.y | dest.x | dest.y) & ~7:
+            return Failure.illegal_move(move)
 
+        kind = move.type_index
         # Wall placement
-        if isinstance(move, PlaceMine):
+        if kind == _PLACE_MINE:
             # check that the player has mines remaining
             if self.initial_moves[move.player]["mines"] <= 0:
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
 
             # check that the mine is on the allowed rows
             if move.origin.y not in (3, 4):
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
 
-        elif isinstance(move, PlaceTrapdoor):
+        elif kind == _PLACE_TRAPDOOR:
             # check that the player has trapdoors remaining
             if self.initial_moves[move.player]["trapdoors"] <= 0:
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
 
             # check that the trapdoor is on the allowed rows
             if move.origin.y not in (2, 3, 4, 5):
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
 
-        elif isinstance(move, NullMove):
+        elif kind == _NULL_MOVE:
             # Null moves are only valid if there are initial moves remaining
             if (
                 self.initial_moves[move.player]["trapdoors"] <= 0
                 and self.initial_moves[move.player]["mines"] <= 0
             ):
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
 
         else:
             # check that an even number of initial moves have been made
             # the values of initial_moves at this point can be 0, 2 or 4
             if self.initial_moves["total"] % 2 != 0:
-                return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                return Failure.illegal_move(move)
             # set the initial moves to 0 for both players and both types of obstacle
             self.initial_moves = {
                 "total": 0,
                 Player.WHITE: {"mines": 0, "trapdoors": 0},
                 Player.BLACK: {"mines": 0, "trapdoors": 0},
             }
-            if isinstance(move, PlaceWall):
+            if kind == _PLACE_WALL:
                 # Due to the way the PlaceWall move is constructed, we can assume that the move is valid if both the origin and destination are on the board, which is checked above
-                back, front = Wall.coords_to_walls(move.origin, move.destination)
-                # check that the wall does not already exist
-                if self[move.origin].walls & move.wall:
-                    return Failure(Error.ILLEGAL_MOVE % move.canonical())
+                # check that the wall does not already exist, in the bitboard of walls of that kind
+                if self._walls[move.wall.value.bit_length() - 1] >> (move.origin.y * 8 + move.origin.x) & 1:
+                    return Failure.illegal_move(move)
             else:
-                if move not in self.get_moves(move.origin):
+                if not self._is_valid_move(move):
                     return Failure(move)
                 return Success(move)
             # elif isinstance(move, Castle):
@@ -1385,67 +1970,148 @@ class Board:
             The position of the mine that is detonating
         """
         # clear this node
-        self[pos].contents = None
+        self.set_contents(pos, None)
 
         # remove the mine
-        self[pos].mined = False
+        self.set_mined(pos, False)
 
-        # clear the nodes around this node if the walls allow for that
-        for neighbour in self.get_neighbours(pos):
-            direction = (neighbour - pos).norm()
-            if not self.wall_blocked(pos, direction):
-                self[neighbour].contents = None
+        # clear the occupied nodes around this node if the walls allow for that
+        sq = pos.y * 8 + pos.x
+        stops = self._get_wall_stops()
+        occupied = self._occupied
+        for direction, target in MINE_BLAST[sq]:
+            if occupied >> target & 1 and not stops[direction] >> sq & 1:
+                self.set_contents(SQUARES[target], None)
 
         # reset the halfmove clock
         self.state.clock = 0
 
     def apply_move(self, move: Move) -> Result["Board"]:
         """Applies the given (valid) move to the board, returning a new Result holding the board and leaving the original unchanged."""
-
-        # initialise the new board
         new_board = self.copy()
         new_board.state.clock += 1
+        new_board._apply(move)
+        return Success(new_board)
+
+    def make_move(self, move: Move) -> MoveUndo:
+        """Applies the given (valid) move to this board in place.
+
+        Only the nodes the move can touch are saved, which is far cheaper than copying the board.
+
+        Parameters
+        ----------
+        move : Move
+            The move to apply.
 
+        Returns
+        -------
+        MoveUndo
+            The record to pass to `unmake_move` to take the move back.
+        """
+        nodes = []
+        for pos in self._touched_by(move):
+            sq = pos.y * 8 + pos.x
+            # give up ownership of the original nodes, so the move changes copies of them
+            self._owned &= ~(1 << sq)
+            nodes.append((pos, self._nodes[sq]))
+        undo = MoveUndo(move, self.state, self.turn, self.mine_detonated, nodes)
+        # the state is likewise replaced rather than modified
+        self.state = self.state.copy()
+        self.state.clock += 1
+        self.mine_detonated = False
+        self._apply(move)
+        return undo
+
+    def _apply(self, move: Move):
+        """Applies the given (valid) move to this board in place, other than the halfmove clock increment."""
         # Apply the move
-        piece, capture = False, False
-        if isinstance(move, PlaceMine):
-            new_board[move.origin].mined = True
-            new_board.state.clock = 0
-            new_board.initial_moves[move.player]["mines"] -= 1
-            new_board.initial_moves["total"] -= 1
-
-        elif isinstance(move, PlaceTrapdoor):
-            new_board[move.origin].trapdoor = TrapdoorState.HIDDEN
-            new_board.state.clock = 0
-            new_board.initial_moves[move.player]["trapdoors"] -= 1
-            new_board.initial_moves["total"] -= 1
-
-        elif isinstance(move, NullMove):
-            # decrement the initial moves counter to show that a move has been made
-            new_board.initial_moves["total"] -= 1
-        else:
-            if isinstance(move, PlaceWall):
-                new_board.state.walls[move.player] -= 1
-                new_board[move.origin].walls |= move.wall
-                new_board[move.wall.blocking(move.origin)].walls |= move.wall.alternate()
+        kind = move.type_index
+        if kind == _PLACE_MINE:
+            self.set_mined(move.origin, True)
+            self.state.clock = 0
+            self.initial_moves[move.player]["mines"] -= 1
+            self.initial_moves["total"] -= 1
 
-            elif isinstance(move, Castle):
-                new_board._castle(move)
+        elif kind == _PLACE_TRAPDOOR:
+            self.set_trapdoor(move.origin, TrapdoorState.HIDDEN)
+            self.state.clock = 0
+            self.initial_moves[move.player]["trapdoors"] -= 1
+            self.initial_moves["total"] -= 1
 
-            elif isinstance(move, Promotion):
-                new_board.move_piece(move)
-                new_board[move.destination].contents = move.promotion(move.player)
+        elif kind == _NULL_MOVE:
+            # decrement the initial moves counter to show that a move has been made
+            self.initial_moves["total"] -= 1
+        else:
+            if kind == _PLACE_WALL:
+                # replace the wall counts, as they may be shared with copies of the state
+                self.state.walls = {**self.state.walls, move.player: self.state.walls[move.player] - 1}
+                blocked = move.wall.blocking(move.origin)
+                nodes = self._nodes
+                self.set_walls(move.origin, nodes[move.origin.y * 8 + move.origin.x].walls | move.wall)
+                # a wall on the edge of the board has no node on its other side
+                if _on_board(blocked):
+                    self.set_walls(blocked, nodes[blocked.y * 8 + blocked.x].walls | move.wall.alternate())
+
+            elif kind in _CASTLES:
+                self._castle(move)
+
+            elif kind == _PROMOTION:
+                self.move_piece(move)
+                self.set_contents(move.destination, move.promotion(move.player))
 
-            elif isinstance(move, Move):
-                new_board.move_piece(move)
+            else:
+                self.move_piece(move)
 
         # alternate the player
-        new_board.state.player = new_board.state.player.opponent()
+        self.state.player = self.state.player.opponent()
 
         # increment the move counter
-        new_board.turn += 1
+        self.turn += 1
 
-        return Success(new_board)
+    def unmake_move(self, undo: MoveUndo):
+        """Takes back a move made with `make_move`, restoring the board to exactly how it was before.
+
+        Parameters
+        ----------
+        undo : MoveUndo
+            The record returned by `make_move`. Moves must be taken back in the reverse order they were made.
+        """
+        # restore in reverse, so a position saved twice ends up with its original node
+        for pos, node in reversed(undo.nodes):
+            self[pos] = node
+        self.state = undo.state
+        self.turn = undo.turn
+        self.mine_detonated = undo.mine_detonated
+
+        move = undo.move
+        kind = move.type_index
+        if kind == _PLACE_MINE:
+            self.initial_moves[move.player]["mines"] += 1
+            self.initial_moves["total"] += 1
+        elif kind == _PLACE_TRAPDOOR:
+            self.initial_moves[move.player]["trapdoors"] += 1
+            self.initial_moves["total"] += 1
+        elif kind == _NULL_MOVE:
+            self.initial_moves["total"] += 1
+
+    def _touched_by(self, move: Move) -> List[Position]:
+        """Returns every position whose node the given move could change."""
+        kind = move.type_index
+        if kind == _NULL_MOVE:
+            return []
+        elif kind == _PLACE_MINE or kind == _PLACE_TRAPDOOR:
+            return [move.origin]
+        elif kind == _PLACE_WALL:
+            blocked = move.wall.blocking(move.origin)
+            return [move.origin, blocked] if _on_board(blocked) else [move.origin]
+        elif kind in _CASTLES:
+            rook_move = move.rook_move()
+            return [move.origin, move.destination, rook_move.origin, rook_move.destination]
+        origin, dest = move.origin, move.destination
+        # an en-passant capture clears the square beside the origin, and a mine clears the neighbours of the destination
+        touched = [origin, dest, Position(dest.x, origin.y)]
+        touched.extend(NEIGHBOURS[dest.y * 8 + dest.x])
+        return touched
 
     def _castle(self, move: Castle):
         """Private method for castling.
@@ -1461,15 +2127,15 @@ class Board:
         """
         rook_move = move.rook_move()
         # pop out the king
-        king_piece = self[move.origin].contents
-        self[move.origin].contents = None
+        king_piece = self._nodes[move.origin.y * 8 + move.origin.x].contents
+        self.set_contents(move.origin, None)
         # pop out the rook
-        rook_piece = self[rook_move.origin].contents
-        self[rook_move.origin].contents = None
+        rook_piece = self._nodes[rook_move.origin.y * 8 + rook_move.origin.x].contents
+        self.set_contents(rook_move.origin, None)
 
         # place the king and rook in their new positions
-        self[move.destination].contents = king_piece
-        self[rook_move.destination].contents = rook_piece
+        self.set_contents(move.destination, king_piece)
+        self.set_contents(rook_move.destination, rook_piece)
 
     def move_piece(
         self, move: Move
@@ -1492,12 +2158,13 @@ class Board:
         """
         # extract origin and destination
         origin, dest = move.origin, move.destination
+        dest_sq = dest.y * 8 + dest.x
 
-        capture = None
-        if self[dest].contents is not None:  # capturing
-            capture = self[dest].contents  # store the captured piece
+        # read both nodes once, as only the en-passant square is looked up again
+        capture = self._nodes[dest_sq].contents
+        if capture is not None:  # capturing
             self.state.clock = 0  # reset halfmove clock
-        piece = self[origin].contents
+        piece = self._nodes[origin.y * 8 + origin.x].contents
         if isinstance(piece, Pawn):  # pawn move
             self.state.clock = 0  # reset halfmove clock
             if abs(origin.y - dest.y) == 2:  # double move
@@ -1511,31 +2178,25 @@ class Board:
                 capture_pos = Position(
                     dest.x, origin.y
                 )  # the capture position has the same y as the origin and the same x as the destination
-                capture = self[capture_pos].contents
-                self[capture_pos].contents = None
+                capture = self._nodes[capture_pos.y * 8 + capture_pos.x].contents
+                self.set_contents(capture_pos, None)
             else:  # reset enpassant target
                 self.state.enpassant = None
         else:
             # reset enpassant target if another piece moves
             self.state.enpassant = None
             if isinstance(piece, King):
-                self.state.castling[piece.owner] = {
-                    "king": False,
-                    "queen": False,
-                }
+                self.state.castling &= ~PLAYER_CASTLING[piece.owner]
             elif isinstance(piece, Rook):
-                if origin.x == 0:
-                    self.state.castling[piece.owner]["queen"] = False
-                elif origin.x == 7:
-                    self.state.castling[piece.owner]["king"] = False
+                self.state.castling &= ~ROOK_CASTLING.get((piece.owner, origin.x), 0)
 
         # move the piece
-        self[dest].contents = self[origin].contents
-        self[origin].contents = None
+        self.set_contents(dest, piece)
+        self.set_contents(origin, None)
 
-        dest_node = self[dest]
+        dest_bit = 1 << dest_sq
         # check for mine detonation
-        if dest_node.mined:
+        if self._mines & dest_bit:
             # set the halfmove clock to 0
             self.state.clock = 0
 
@@ -1544,12 +2205,13 @@ class Board:
             self.mine_detonated = True
 
         # check for trapdoor opening
-        if dest_node.trapdoor is not TrapdoorState.NONE:
+        hidden = self._trapdoors[TrapdoorState.HIDDEN.value] & dest_bit
+        if hidden or self._trapdoors[TrapdoorState.OPEN.value] & dest_bit:
             # set the halfmove clock to 0
             self.state.clock = 0
             # open the trapdoor if it is hidden
-            if dest_node.trapdoor is TrapdoorState.HIDDEN:
-                dest_node.trapdoor = TrapdoorState.OPEN
-            dest_node.contents = None
+            if hidden:
+                self.set_trapdoor(dest, TrapdoorState.OPEN)
+            self.set_contents(dest, None)
 
         return capture
@@ -1837,12 +1837,13 @@ class App:
                                 if self.current_game.board[click_res.pos].walls & click_res.wall: 
                                     # remove the wall
                                     placed_walls -= 1
-                                    self.current_game.board[click_res.pos].walls &= ~click_res.wall
-                                    self.current_game.board[click_res.wall.blocking(click_res.pos)].walls &= ~click_res.wall.alternate()
+                                    blocked = click_res.wall.blocking(click_res.pos)
+                                    self.current_game.board.set_walls(click_res.pos, self.current_game.board[click_res.pos].walls & ~click_res.wall)
+                                    self.current_game.board.set_walls(blocked, self.current_game.board[blocked].walls & ~click_res.wall.alternate())
                                 else:
                                     # add the wall
                                     placed_walls += 1
-                                    self.current_game.board[click_res.pos].walls |= click_res.wall
+                                    self.current_game.board.set_walls(click_res.pos, self.current_game.board[click_res.pos].walls | click_res.wall)
                                     self.current_game.board.normalise_walls()
                                     # remove the wall placement widget
                                 self.root.get_by_id("play_box").deregister(placer)
@@ -1862,9 +1863,9 @@ class App:
             elif isinstance(click_res, BoardTile): # tile selected
                 # if a piece has been selected, place that piece, else clear that tile
                 if selected_piece:
-                    self.current_game.board[click_res.pos].contents = selected_piece
+                    self.current_game.board.set_contents(click_res.pos, selected_piece)
                 else:
-                    self.current_game.board[click_res.pos].contents = None
+                    self.current_game.board.set_contents(click_res.pos, None)
             
             elif isinstance(click_res, PieceButton): # piece selected
                 # if the piece selected is the same as the last selected, clear the selection
@@ -233,25 +233,10 @@ class Wall(enum.Flag):
             The correct wall code for _from and for _to
         """
         x1, y1, x2, y2 = _from.x, _from.y, _to.x, _to.y
-        if x1 != x2:
-            return (Wall.EAST, Wall.WEST) if x2 > x1 else (Wall.WEST, Wall.EAST)
-        if y1 != y2:
-            return (Wall.SOUTH, Wall.NORTH) if y2 > y1 else (Wall.NORTH, Wall.SOUTH)
-        from_walls = Wall(0)
-        to_walls = Wall(0)
-        if y1 > y2:
-            from_walls |= Wall.NORTH
-            to_walls &= Wall.SOUTH
-        else:
-            from_walls &= Wall.SOUTH
-            to_walls &= Wall.NORTH
-        if x1 > x2:
-            from_walls &= Wall.WEST
-            to_walls &= Wall.EAST
-        else:
-            from_walls &= Wall.EAST
-            to_walls &= Wall.WEST
-        return (from_walls, to_walls)
+        # horizontal movement takes precedence, so a diagonal is treated as its horizontal part
+        dx = (x2 > x1) - (x2 < x1)
+        dy = 0 if dx else (y2 > y1) - (y2 < y1)
+        return _WALL_PAIRS.get((dx, dy), (Wall(0), Wall(0)))
 
     @classmethod
     def coords_to_walls(cls, _from: Position, _to: Position) -> tuple:
@@ -270,14 +255,8 @@ class Wall(enum.Flag):
             The wall flag
         """
         x1, y1, x2, y2 = _from.x, _from.y, _to.x, _to.y
-        # East-West movement
-        if x1 == x2 and y1 != y2:
-            return (Wall.SOUTH, Wall.NORTH) if y2 > y1 else (Wall.NORTH, Wall.SOUTH)
-        # North-South movement
-        elif x1 != x2 and y1 == y2:
-            return (Wall.EAST, Wall.WEST) if x2 > x1 else (Wall.WEST, Wall.EAST)
-        else:
-            return (Wall(0), Wall(0))
+        # keyed by the sign of the movement along each axis, so only straight movement has walls
+        return _WALL_PAIRS.get(((x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)), (Wall(0), Wall(0)))
 
 
     def blocking(self, pos) -> Position:
@@ -289,16 +268,10 @@ class Wall(enum.Flag):
         Returns:
             Position: The blocked position
         """
-        if self == Wall.NORTH:
-            return pos + P(0, 1)
-        elif self == Wall.SOUTH:
-            return pos + P(0, -1)
-        elif self == Wall.EAST:
-            return pos + P(1, 0)
-        elif self == Wall.WEST:
-            return pos + P(-1, 0)
-        else:
+        offset = _WALL_OFFSETS.get(self)
+        if offset is None:
             raise ValueError("Invalid wall")
+        return pos + offset
 
     def alternate(self) -> "Wall":
         """Returns the opposite wall
@@ -308,16 +281,32 @@ class Wall(enum.Flag):
         Wall
             The opposite wall
         """
-        if self == Wall.NORTH:
-            return Wall.SOUTH
-        elif self == Wall.SOUTH:
-            return Wall.NORTH
-        elif self == Wall.EAST:
-            return Wall.WEST
-        elif self == Wall.WEST:
-            return Wall.EAST
-        else:
-            return Wall(0)
+        return _OPPOSITE_WALLS.get(self, Wall(0))
+
+
+_WALL_OFFSETS = {
+    Wall.NORTH: P(0, 1),
+    Wall.SOUTH: P(0, -1),
+    Wall.EAST: P(1, 0),
+    Wall.WEST: P(-1, 0),
+}
+"""The offset to the position each single wall blocks"""
+
+_OPPOSITE_WALLS = {
+    Wall.NORTH: Wall.SOUTH,
+    Wall.SOUTH: Wall.NORTH,
+    Wall.EAST: Wall.WEST,
+    Wall.WEST: Wall.EAST,
+}
+"""The wall on the other side of each single wall"""
+
+_WALL_PAIRS = {
+    (0, 1): (Wall.SOUTH, Wall.NORTH),
+    (0, -1): (Wall.NORTH, Wall.SOUTH),
+    (1, 0): (Wall.EAST, Wall.WEST),
+    (-1, 0): (Wall.WEST, Wall.EAST),
+}
+"""The (back, front) walls between two positions, keyed by the sign of the movement along each axis"""
 
 
 class TrapdoorState(enum.Enum):
@@ -427,6 +416,43 @@ class Failure(Result):
         f(*args)
         return self
 
+    @classmethod
+    def illegal_move(cls, move) -> "Failure":
+        """Returns a Failure for an illegal move, which only formats its message (`Error.ILLEGAL_MOVE`) when unwrapped
+
+        Parameters
+        ----------
+        move : Move
+            The illegal move
+
+        Returns
+        -------
+        Failure
+            The Failure
+        """
+        return _DeferredFailure(Error.ILLEGAL_MOVE, move)
+
+
+class _DeferredFailure(Failure):
+    """A Failure whose message is formatted from a template and the canonical form of a subject the first time it is unwrapped.
+
+    Callers that only check `isinstance(result, Failure)` never pay for building the message.
+    """
+
+    def __init__(self, template: str, subject) -> None:
+        super().__init__(None)
+        self._template = template
+        self._subject = subject
+
+    def unwrap(self) -> str:
+        if self._subject is not None:
+            self.inject(self._template % self._subject.canonical())
+            self._subject = None
+        return super().unwrap()
+
+    def __repr__(self) -> str:
+        return f"Failure({self.unwrap()})"
+
 
 class Player(enum.Enum):
     """Player enum
@@ -465,6 +491,18 @@ class Player(enum.Enum):
         return Player.WHITE if self == Player.BLACK else Player.BLACK
 
 
+CASTLING_RIGHTS = {
+    Player.WHITE: {"king": 0b0001, "queen": 0b0010},
+    Player.BLACK: {"king": 0b0100, "queen": 0b1000},
+}
+"""The bit of each castling right in a packed set of castling rights, ordered as in a status line"""
+
+PLAYER_CASTLING = {
+    player: sides["king"] | sides["queen"] for player, sides in CASTLING_RIGHTS.items()
+}
+"""The bits of both of a player's castling rights"""
+
+
 def is_white(i, j) -> bool:
     """Determines is a square is white or black
 
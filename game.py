@@ -340,7 +340,7 @@ class Game:
             if self.board.state.clock < 100:
                 self.fifty_moves_announced = False
             # if not checkmate, check for check
-            if self.board.in_check(move.player.opponent()):
+            if self.board.is_in_check(move.player.opponent()):
                 sig|=GameSignal.CHECK
             # stalemate
             elif self.board.stalemate():
@@ -355,11 +355,11 @@ class Game:
                 sig|=GameSignal.THREEFOLD_AVAILABLE
                 
             # if the player who just moved is in check, their move was illegal
-            if self.board.in_check(move.player):
+            if self.board.is_in_check(move.player):
                 sig|=GameSignal.ILLEGAL_MOVE
             
             # checkmate
-            if self.board.checkmate():
+            if self.board.checkmate_any():
                 sig|=GameSignal.CHECKMATE
                 self.completed = True
             
@@ -393,7 +393,7 @@ class Game:
         inner = trailing_move_res.unwrap()
         # if a move was pulled, it is illegal
         if inner is not None:
-            return Failure(Error.ILLEGAL_MOVE % inner.canonical())
+            return Failure.illegal_move(inner)
             
         
     def set_board(self, new_board) -> Result[Board]:
@@ -13,6 +13,9 @@ class Piece:
     jumps = False
     """Whether the piece can jump over other pieces and walls."""
 
+    type_index = 0
+    """A small integer identifying the type of the piece."""
+
     def __init__(self, owner: Player) -> None:
         self.owner = owner
         """The player this piece belongs to"""
@@ -80,6 +83,8 @@ class Piece:
 class Pawn(Piece):
     """A pawn."""
 
+    type_index = 1
+
     def canonical(self) -> str:
         return "p" if self.owner == Player.BLACK else "P"
 
@@ -99,6 +104,8 @@ class Pawn(Piece):
 class Knight(Piece):
     """A knight."""
 
+    type_index = 2
+
     jumps = True
 
     offsets = [
@@ -134,6 +141,8 @@ class Knight(Piece):
 class Bishop(Piece):
     """A bishop."""
 
+    type_index = 3
+
     def canonical(self) -> str:
         return "b" if self.owner == Player.BLACK else "B"
 
@@ -150,6 +159,8 @@ class Bishop(Piece):
 class Rook(Piece):
     """A rook."""
 
+    type_index = 4
+
     def canonical(self) -> str:
         return "r" if self.owner == Player.BLACK else "R"
 
@@ -166,6 +177,8 @@ class Rook(Piece):
 class Queen(Piece):
     """A queen."""
 
+    type_index = 5
+
     def canonical(self) -> str:
         return "q" if self.owner == Player.BLACK else "Q"
 
@@ -181,6 +194,8 @@ class Queen(Piece):
 class King(Piece):
     """A king."""
 
+    type_index = 6
+
     def canonical(self) -> str:
         return "k" if self.owner == Player.BLACK else "K"
 
@@ -0,0 +1,76 @@
+"""Zobrist keys for hashing board positions.
+
+Each feature of a position (a piece on a square, a mine, a trapdoor, a wall, the side to move, ...) is assigned a random 64-bit key.
+The hash of a position is the XOR of the keys of all the features present, so it can be updated incrementally as features are added and removed.
+"""
+
+import random
+
+from common import *
+
+_rng = random.Random(0x0B57AC1E)
+"""Seeded so that hashes are stable between runs"""
+
+
+def _keys(n: int) -> list:
+    return [_rng.getrandbits(64) for _ in range(n)]
+
+
+def _xor_bits(bits: int, keys: list) -> int:
+    retval = 0
+    for i, key in enumerate(keys):
+        if bits >> i & 1:
+            retval ^= key
+    return retval
+
+
+PIECE_ORDER = ("pawn", "knight", "bishop", "rook", "queen", "king")
+"""The order in which piece types are assigned keys"""
+
+PIECES = {
+    (name, player): _keys(64) for name in PIECE_ORDER for player in Player
+}
+"""Keys for each (piece name, owner) on each square"""
+
+MINES = _keys(64)
+"""Keys for a mine on each square"""
+
+TRAPDOORS = {
+    TrapdoorState.NONE: [0] * 64,
+    TrapdoorState.HIDDEN: _keys(64),
+    TrapdoorState.OPEN: _keys(64),
+}
+"""Keys for each trapdoor state on each square"""
+
+WALLS = {wall: _keys(64) for wall in (Wall.NORTH, Wall.SOUTH, Wall.EAST, Wall.WEST)}
+"""Keys for each wall on each square"""
+
+SIDE = _rng.getrandbits(64)
+"""Key for black to move"""
+
+_CASTLING_KEYS = _keys(4)
+
+CASTLING = [
+    _xor_bits(rights, _CASTLING_KEYS) for rights in range(16)
+]
+"""Keys for each packed set of castling rights, the XOR of the keys of each right held"""
+
+ENPASSANT = _keys(64)
+"""Keys for the square of the en-passant target"""
+
+
+def walls_hash(walls: Wall, sq: int) -> int:
+    """The hash contribution of a set of walls on a square"""
+    retval = 0
+    for wall, keys in WALLS.items():
+        if walls & wall:
+            retval ^= keys[sq]
+    return retval
+
+
+def state_hash(state) -> int:
+    """The hash contribution of the side to move, castling rights and en-passant target of a board state"""
+    retval = (SIDE if state.player == Player.BLACK else 0) ^ CASTLING[state.castling]
+    if state.enpassant is not None:
+        retval ^= ENPASSANT[state.enpassant.y * 8 + state.enpassant.x]
+    return retval